@@ -0,0 +1,188 @@
+"""Local HTTP JSON service for the dashboard aggregates (requires aiohttp).
+
+Serves the same cached :class:`~alert_engine.AlertEngine` the dashboard
+uses, for the source in ``ALERT_SOURCE``::
+
+    python alert_api.py --port 8765
+    curl 'localhost:8765/aggregates?period=Last+30+Days&fleets=Fleet+A&fleets=Fleet+B'
+
+``top=K`` keeps only the K largest alert type, fleet and vessel counts.
+``/percentiles`` returns p50/p90/p99 resolution times, per fleet or alert
+type with ``by=Fleet`` or ``by=Alert+Type``. ``/repeat_alerts`` returns one
+page of the vessel/alert type pairs with ``min_count`` or more alerts,
+sorted by ``sort_by`` (Count, Vessel or Alert Type; ``ascending=1`` to
+flip), with ``page`` and ``page_size``.
+
+Query parameters: ``period`` (one of the sidebar periods, default Last 30
+Days), ``start_date``/``end_date`` for Custom Range, and repeated
+``fleets``, ``alert_types`` and ``vessels`` values. An omitted list keeps
+everything; an empty value (``fleets=``) selects nothing, like clearing
+the multiselect.
+
+Queries run on a thread pool so the event loop keeps accepting requests;
+concurrent requests for the same selection share one computation through
+the view cache.
+"""
+import argparse
+import asyncio
+import json
+import math
+
+import pandas as pd
+
+from alert_engine import PERIODS, AlertEngine, AlertFilters
+from alert_metrics import REPEAT_MIN_COUNT, REPEAT_SORT_COLUMNS, page_of, top_k
+
+DEFAULT_PERIOD = "Last 30 Days"
+MAX_PAGE_SIZE = 1000
+
+
+def _aiohttp():
+    try:
+        from aiohttp import web
+    except ImportError as e:
+        raise ImportError("The HTTP service needs aiohttp: pip install aiohttp") from e
+    return web
+
+
+def _number(value):
+    value = value.item() if hasattr(value, 'item') else value
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def _counts(series, top=None):
+    series = top_k(series, top)
+    return [{'label': str(label), 'count': int(count)} for label, count in series.items()]
+
+
+def result_json(result, top=None):
+    """JSON-ready dict of a :class:`~alert_engine.DashboardResult`.
+
+    Per-label counts are listed largest first; ``top`` keeps only that many.
+    """
+    filters = result.filters
+    trend = result.alerts_time_df
+    return {
+        'filters': {
+            'start_date': filters.start_date.isoformat(),
+            'end_date': filters.end_date.isoformat(),
+            'fleets': list(filters.fleets),
+            'alert_types': list(filters.alert_types),
+            'vessels': None if filters.vessels is None else list(filters.vessels),
+        },
+        'kpis': {name: _number(value) for name, value in result.kpi_dict().items()},
+        'alerts_time': {
+            'date': trend['Date'].dt.strftime('%Y-%m-%d').tolist(),
+            'total': trend['Total Alerts'].tolist(),
+            'active': trend['Active Alerts'].tolist(),
+            'resolved': trend['Resolved Alerts'].tolist(),
+        },
+        'alert_type_counts': _counts(result.alert_type_counts, top),
+        'fleet_alerts': _counts(result.fleet_alerts, top),
+        'vessel_counts': _counts(result.vessel_counts, top),
+        'res_time_counts': _counts(result.res_time_counts),
+        'repeat_alerts': [
+            {'vessel': str(vessel), 'alert_type': str(alert_type), 'count': int(count)}
+            for vessel, alert_type, count in result.repeat_alerts.itertuples(index=False)
+        ],
+    }
+
+
+def parse_filters(query, today):
+    """:class:`~alert_engine.AlertFilters` from request query parameters; ValueError if invalid."""
+    period = query.get('period', DEFAULT_PERIOD)
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {PERIODS}")
+    custom = {name: pd.Timestamp(query[name]) for name in ('start_date', 'end_date') if name in query}
+    selection = {}
+    for name in ('fleets', 'alert_types', 'vessels'):
+        if name in query:
+            selection[name] = [value for value in query.getall(name) if value]
+    return AlertFilters.for_period(period, today, **custom, **selection)
+
+
+def create_app(engine=None):
+    """aiohttp application serving ``engine`` (the ``ALERT_SOURCE`` one by default)."""
+    web = _aiohttp()
+    engine = engine or AlertEngine()
+
+    async def run(fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    async def filters_or_400(request):
+        today = await run(engine.latest_date)
+        if pd.isna(today):
+            raise web.HTTPServiceUnavailable(text=json.dumps({'error': "no alerts yet"}), content_type='application/json')
+        try:
+            return parse_filters(request.query, today)
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=json.dumps({'error': str(e)}), content_type='application/json')
+
+    async def aggregates(request):
+        filters = await filters_or_400(request)
+        try:
+            top = int(request.query['top']) if 'top' in request.query else None
+        except ValueError:
+            raise web.HTTPBadRequest(text=json.dumps({'error': "top must be an integer"}), content_type='application/json')
+        result = await run(engine.query, filters)
+        return web.json_response(result_json(result, top))
+
+    async def vessels(request):
+        filters = await filters_or_400(request)
+        return web.json_response({'vessels': [str(v) for v in await run(engine.vessel_options, filters)]})
+
+    async def percentiles(request):
+        filters = await filters_or_400(request)
+        by = request.query.get('by')
+        if by not in (None, 'Fleet', 'Alert Type'):
+            raise web.HTTPBadRequest(text=json.dumps({'error': "by must be Fleet or Alert Type"}),
+                                     content_type='application/json')
+        table = await run(lambda: engine.percentiles(filters, by=by))
+        if by is None:
+            return web.json_response({name: _number(value) for name, value in table.items()})
+        return web.json_response([{'label': str(label), **{name: _number(value) for name, value in row.items()}}
+                                  for label, row in table.iterrows()])
+
+    async def repeat_alerts(request):
+        filters = await filters_or_400(request)
+        query = request.query
+        try:
+            min_count = int(query.get('min_count', REPEAT_MIN_COUNT))
+            page = int(query.get('page', 1))
+            page_size = min(max(int(query.get('page_size', 100)), 1), MAX_PAGE_SIZE)
+        except ValueError:
+            raise web.HTTPBadRequest(text=json.dumps({'error': "min_count, page and page_size must be integers"}),
+                                     content_type='application/json')
+        sort_by = query.get('sort_by', 'Count')
+        if sort_by not in REPEAT_SORT_COLUMNS:
+            raise web.HTTPBadRequest(text=json.dumps({'error': f"sort_by must be one of {REPEAT_SORT_COLUMNS}"}),
+                                     content_type='application/json')
+        ascending = query.get('ascending', '0') not in ('0', 'false', '')
+        table = await run(lambda: engine.repeat_alerts(filters, min_count, sort_by, ascending))
+        rows, page, n_pages = page_of(table, page, page_size)
+        return web.json_response({
+            'total': len(table), 'page': page, 'pages': n_pages,
+            'rows': [{'vessel': str(vessel), 'alert_type': str(alert_type), 'count': int(count)}
+                     for vessel, alert_type, count in rows.itertuples(index=False)],
+        })
+
+    async def health(request):
+        return web.json_response({'status': 'ok', 'source': engine.source})
+
+    app = web.Application()
+    app.add_routes([
+        web.get('/aggregates', aggregates),
+        web.get('/vessels', vessels),
+        web.get('/percentiles', percentiles),
+        web.get('/repeat_alerts', repeat_alerts),
+        web.get('/health', health),
+    ])
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve dashboard aggregates as JSON")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    _aiohttp().run_app(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,242 @@
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from alert_cache import LRUCache
+from alert_schema import CATEGORIES, apply_schema, codes
+
+# Bytes added whenever the bitsets run out of room
+GROWTH_BYTES = 1 << 16
+
+# Past this many labels a dimension keeps sorted row numbers per label instead of bitsets:
+# 8 bytes per row for the whole dimension rather than one bit per row per label
+SPARSE_LABELS = 64
+
+# Packed selection over rows ``lo:lo + length``; ``offset`` is the first row's bit within ``bits``
+BitSelection = namedtuple('BitSelection', ['bits', 'offset', 'lo', 'length'])
+
+_bitmap_cache = LRUCache(maxsize=4)
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(bits):
+        return int(np.bitwise_count(bits).sum())
+else:
+    _POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def _popcount(bits):
+        return int(_POPCOUNT[bits].sum(dtype=np.int64))
+
+
+class BitmapIndex:
+    """Packed bitsets per fleet, vessel and alert type, plus one for Auto-Cleared.
+
+    Bit ``i`` of a bitset is set when row ``i`` carries that label, so a
+    filter combination is an OR of bitsets within a dimension and an AND
+    across dimensions, at one bit per row per label. Counts come from a
+    popcount, without materializing any rows.
+
+    A dimension with more than ``SPARSE_LABELS`` labels (vessels of a large
+    fleet) stores each label's sorted row numbers instead; a selection sets
+    the bits of the chosen labels' rows, so its cost follows the rows
+    selected rather than the number of labels.
+
+    Rows can be appended at the end and dropped from the front, which is how
+    a live window moves; ``version`` changes with every update.
+    """
+
+    def __init__(self):
+        self.bitmaps = {dim: {} for dim in CATEGORIES}
+        # Row numbers (bit positions) per label of the sparse dimensions, as chunks merged on read
+        self.postings = {}
+        self.auto_cleared = np.zeros(GROWTH_BYTES, dtype=np.uint8)
+        self.start = 0  # first live bit
+        self.end = 0
+        self.version = 0
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def nbytes(self):
+        arrays = [self.auto_cleared] + [bm for bitmaps in self.bitmaps.values() for bm in bitmaps.values()]
+        arrays += [chunk for postings in self.postings.values() for chunks in postings.values() for chunk in chunks]
+        return sum(a.nbytes for a in arrays)
+
+    @classmethod
+    def build(cls, df):
+        index = cls()
+        index.append(df)
+        return index
+
+    def copy(self):
+        """Independent, compacted copy of the live rows (e.g. to freeze a snapshot)."""
+        with self._lock:
+            first = self.start // 8
+            n_bytes = (self.end + 7) // 8 - first
+            index = BitmapIndex()
+            index.auto_cleared = self.auto_cleared[first:first + n_bytes].copy()
+            index.bitmaps = {dim: {label: bm[first:first + n_bytes].copy() for label, bm in bitmaps.items()}
+                             for dim, bitmaps in self.bitmaps.items()}
+            index.postings = {dim: {label: [self._rows_of(dim, label) - 8 * first] for label in postings}
+                              for dim, postings in self.postings.items()}
+            index.start = self.start - 8 * first
+            index.end = self.end - 8 * first
+            index.version = self.version
+            return index
+
+    def _resize(self, keep_from_byte, n_bytes):
+        """Move every bitset to a zeroed buffer of ``n_bytes``, dropping bytes before ``keep_from_byte``."""
+        def moved(a):
+            out = np.zeros(n_bytes, dtype=np.uint8)
+            used = a[keep_from_byte:(self.end + 7) // 8]
+            out[:len(used)] = used
+            return out
+
+        self.auto_cleared = moved(self.auto_cleared)
+        for bitmaps in self.bitmaps.values():
+            for label in bitmaps:
+                bitmaps[label] = moved(bitmaps[label])
+        for dim, postings in self.postings.items():
+            for label in postings:
+                rows = self._rows_of(dim, label)
+                postings[label] = [rows[rows >= 8 * keep_from_byte] - 8 * keep_from_byte]
+        self.start -= 8 * keep_from_byte
+        self.end -= 8 * keep_from_byte
+
+    def _rows_of(self, dim, label):
+        """Sorted bit positions of ``label``, merging its appended chunks."""
+        chunks = self.postings[dim][label]
+        if len(chunks) > 1:
+            chunks[:] = [np.concatenate(chunks)]
+        return chunks[0]
+
+    def _sparsify(self, dim):
+        """Switch ``dim`` from bitsets to row numbers once it has too many labels."""
+        self.postings[dim] = {label: [np.flatnonzero(np.unpackbits(bitmap))] for label, bitmap in self.bitmaps[dim].items()}
+        self.bitmaps[dim] = {}
+
+    def _write(self, bitmap, bits):
+        # Bits past ``end`` are always zero, so OR-ing the packed batch in place is enough
+        shift = self.end % 8
+        packed = np.packbits(np.concatenate([np.zeros(shift, dtype=bool), bits]))
+        first = self.end // 8
+        bitmap[first:first + len(packed)] |= packed
+
+    def append(self, batch):
+        """Index the rows of ``batch`` as the next rows after the current end."""
+        batch = apply_schema(batch)
+        n = len(batch)
+        with self._lock:
+            needed = (self.end + n + 7) // 8
+            if needed > len(self.auto_cleared):
+                self._resize(0, max(needed + GROWTH_BYTES, 2 * len(self.auto_cleared)))
+            size = len(self.auto_cleared)
+            for dim, bitmaps in self.bitmaps.items():
+                series = batch[dim]
+                batch_codes = codes(series)
+                # One stable sort groups the rows of every label, each group in row order
+                order = np.argsort(batch_codes, kind='stable')
+                bounds = np.concatenate([[0], np.cumsum(np.bincount(batch_codes + 1, minlength=len(series.cat.categories) + 1))])
+                present = np.flatnonzero(np.diff(bounds)[1:])
+                if dim not in self.postings and len(set(bitmaps).union(series.cat.categories[present])) > SPARSE_LABELS:
+                    self._sparsify(dim)
+                for code in present:
+                    label = series.cat.categories[code]
+                    rows = self.end + order[bounds[code + 1]:bounds[code + 2]]
+                    if dim in self.postings:
+                        self.postings[dim].setdefault(label, []).append(rows)
+                        continue
+                    if label not in bitmaps:
+                        bitmaps[label] = np.zeros(size, dtype=np.uint8)
+                    _set_bits(bitmaps[label], rows)
+            self._write(self.auto_cleared, batch['Auto-Cleared'].to_numpy())
+            self.end += n
+            self.version += 1
+
+    def drop_front(self, n):
+        """Forget the oldest ``n`` rows; row positions shift down by ``n``."""
+        with self._lock:
+            self.start += min(n, len(self))
+            # Compact once the dead prefix outweighs the live rows
+            if self.start >= 8 * GROWTH_BYTES and self.start > len(self):
+                self._resize(self.start // 8, len(self.auto_cleared))
+            self.version += 1
+
+    def select(self, fleets=None, alert_types=None, vessels=None, lo=0, hi=None):
+        """Bitset of rows ``lo:hi`` matching the selection; ``None`` leaves a dimension open."""
+        with self._lock:
+            hi = len(self) if hi is None else min(hi, len(self))
+            lo = min(lo, hi)
+            first_bit, last_bit = self.start + lo, self.start + hi
+            b0, b1 = first_bit // 8, (last_bit + 7) // 8
+            bits = np.full(b1 - b0, 0xFF, dtype=np.uint8)
+            for dim, values in (('Fleet', fleets), ('Alert Type', alert_types), ('Vessel', vessels)):
+                if values is None:
+                    continue
+                any_of = np.zeros_like(bits)
+                for value in values:
+                    if dim in self.postings:
+                        if value in self.postings[dim]:
+                            rows = self._rows_of(dim, value)
+                            in_range = rows[np.searchsorted(rows, first_bit):np.searchsorted(rows, last_bit)]
+                            _set_bits(any_of, in_range - 8 * b0)
+                        continue
+                    bitmap = self.bitmaps[dim].get(value)
+                    if bitmap is not None:
+                        any_of |= bitmap[b0:b1]
+                bits &= any_of
+        # packbits is MSB first: clear the bits outside lo:hi in the edge bytes
+        if len(bits):
+            bits[0] &= 0xFF >> (first_bit % 8)
+            if last_bit % 8:
+                bits[-1] &= (0xFF << (8 - last_bit % 8)) & 0xFF
+        return BitSelection(bits, first_bit - 8 * b0, lo, hi - lo)
+
+    def count(self, selection):
+        return _popcount(selection.bits)
+
+    def counts(self, selection):
+        """``(total, active, resolved)`` for a selection, from popcounts alone."""
+        with self._lock:
+            b0 = (self.start + selection.lo) // 8
+            auto = self.auto_cleared[b0:b0 + len(selection.bits)]
+            resolved = _popcount(selection.bits & auto)
+        total = _popcount(selection.bits)
+        return total, total - resolved, resolved
+
+    def rows(self, selection):
+        """Row positions of a selection, or a ``slice`` if it covers ``lo:hi`` entirely."""
+        if self.count(selection) == selection.length:
+            return slice(selection.lo, selection.lo + selection.length)
+        bits = np.unpackbits(selection.bits)[selection.offset:selection.offset + selection.length]
+        return selection.lo + np.flatnonzero(bits)
+
+
+def _set_bits(bitmap, positions):
+    """Set the bits at sorted, distinct ``positions`` (MSB first, like ``packbits``)."""
+    if not len(positions):
+        return
+    byte = positions >> 3
+    first, last = byte[0], byte[-1] + 1
+    # Labels with a row in every few dozen pack a mask of their span; scattering bytes costs more per row
+    if len(positions) * 64 > 8 * (last - first):
+        mask = np.zeros(8 * (last - first), dtype=bool)
+        mask[positions - 8 * first] = True
+        bitmap[first:last] |= np.packbits(mask)
+        return
+    bit = (np.uint8(0x80) >> (positions & 7).astype(np.uint8))
+    starts = np.flatnonzero(np.concatenate([[True], byte[1:] != byte[:-1]]))
+    bitmap[byte[starts]] |= np.bitwise_or.reduceat(bit, starts)
+
+
+def bitmap_for(df):
+    """The bitmap index of a loaded dataset, built once and shared by every session."""
+    key = (df.attrs.get('dataset_id', id(df)), df.attrs.get('version', 0))
+    return _bitmap_cache.get_or_compute(key, lambda: BitmapIndex.build(df))
+
+
+def register_bitmap(dataset_id, version, index):
+    """Serve an externally maintained index (e.g. a live window's) for one snapshot version."""
+    _bitmap_cache.put((dataset_id, version), index)
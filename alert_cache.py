@@ -0,0 +1,137 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+def estimate_nbytes(value):
+    """Rough in-memory size of a cached value, counting pandas data deeply."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Thread-safe LRU cache with an entry limit, optional TTL and byte budget.
+
+    One instance lives at module level, so every Streamlit session served by
+    the process shares it. ``get_or_compute`` holds a per-key lock while the
+    value is built, so concurrent reruns wait for one load instead of
+    starting their own. With ``max_bytes`` set, least recently used entries
+    are evicted until the estimated size of all values fits the budget.
+    """
+
+    def __init__(self, maxsize=8, ttl=None, max_bytes=None, sizeof=estimate_nbytes):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._data = OrderedDict()  # key -> (expires_at, nbytes, value)
+        self._lock = threading.RLock()
+        self._key_locks = {}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, _, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self._remove(key)
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def _remove(self, key):
+        _, nbytes, _ = self._data.pop(key)
+        self.nbytes -= nbytes
+
+    def get(self, key, default=None):
+        value = self._lookup(key)
+        with self._lock:
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+        return value
+
+    def put(self, key, value):
+        expires_at = None if self.ttl is None else time.monotonic() + self.ttl
+        nbytes = self.sizeof(value) if self.max_bytes is not None else 0
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (expires_at, nbytes, value)
+            self.nbytes += nbytes
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while len(self._data) > 1 and (
+                len(self._data) > self.maxsize
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another thread may have filled the entry while we waited
+            value = self._lookup(key)
+            if value is _MISSING:
+                value = compute()
+                self.put(key, value)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return value
+
+    def invalidate(self, key=None, where=None):
+        """Drop one key, every key matching ``where``, or everything."""
+        with self._lock:
+            if where is not None:
+                for k in [k for k in self._data if where(k)]:
+                    self._remove(k)
+            elif key is not None:
+                if key in self._data:
+                    self._remove(key)
+            else:
+                self._data.clear()
+                self.nbytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._data),
+                'nbytes': self.nbytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
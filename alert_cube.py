@@ -0,0 +1,227 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from alert_cache import LRUCache
+from alert_metrics import (
+    REPEAT_MIN_COUNT, alerts_time_frame, bins, counts_series, labels, pairs_frame, res_time_series,
+    resolution_bin_codes,
+)
+from alert_schema import apply_schema, codes
+
+# Cube axes after the day axis
+DIMENSIONS = ('Fleet', 'Vessel', 'Alert Type')
+
+# One cube per loaded dataset
+_cube_cache = LRUCache(maxsize=4)
+
+
+class AlertCube:
+    """Daily pre-aggregate of the alert frame.
+
+    Dense arrays over (day, fleet, vessel, alert type, auto-cleared) hold the
+    alert count, the sum and count of known (non-NaN) resolution times and
+    one count per resolution bin.
+    Their size depends on the number of days and categories, not on the
+    number of alerts, so every dashboard query is a few small array sums.
+
+    ``append`` folds a batch of new alerts into the cube, touching only the
+    days the batch covers, and ``remove`` takes rows back out; ``version``
+    changes with every update.
+    """
+
+    def __init__(self, categories):
+        self.categories = {dim: pd.Index(categories[dim]) for dim in DIMENSIONS}
+        self.first_day = None
+        self.n_days = 0
+        self.version = 0
+        self._lock = threading.RLock()
+        shape = (0,) + tuple(len(self.categories[dim]) for dim in DIMENSIONS) + (2,)
+        self.count = np.zeros(shape, dtype=np.int32)
+        self.res_sum = np.zeros(shape)
+        self.res_count = np.zeros(shape, dtype=np.int32)
+        self.res_bins = np.zeros(shape + (len(labels),), dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        return self.count.nbytes + self.res_sum.nbytes + self.res_count.nbytes + self.res_bins.nbytes
+
+    @classmethod
+    def build(cls, df):
+        cube = cls({dim: df[dim].cat.categories for dim in DIMENSIONS})
+        cube.append(df)
+        return cube
+
+    def _arrays(self):
+        return self.count, self.res_sum, self.res_count, self.res_bins
+
+    def _set_arrays(self, arrays):
+        self.count, self.res_sum, self.res_count, self.res_bins = arrays
+
+    def _batch_positions(self, dim, series):
+        """Cube positions of a batch column, adding categories the cube has not seen."""
+        batch_categories = series.cat.categories
+        mapping = self.categories[dim].get_indexer(batch_categories)
+        new = batch_categories[mapping < 0]
+        if len(new):
+            axis = DIMENSIONS.index(dim) + 1
+            self.categories[dim] = self.categories[dim].append(new)
+            self._set_arrays([
+                np.concatenate([a, np.zeros(a.shape[:axis] + (len(new),) + a.shape[axis + 1:], a.dtype)], axis=axis)
+                for a in self._arrays()
+            ])
+            mapping = self.categories[dim].get_indexer(batch_categories)
+        # Trailing -1 so rows with a missing label map to -1
+        return np.append(mapping, -1)[codes(series)]
+
+    def _ensure_days(self, first, last):
+        """Make the day axis cover ``first..last``; growth at the end is amortized."""
+        if self.first_day is None:
+            self.first_day = first
+        if first < self.first_day:
+            # Backfill before the first day shifts everything once
+            shift = int((self.first_day - first).astype(np.int64))
+            self._set_arrays([np.concatenate([np.zeros((shift,) + a.shape[1:], a.dtype), a]) for a in self._arrays()])
+            self.first_day = first
+            self.n_days += shift
+        needed = int((last - self.first_day).astype(np.int64)) + 1
+        if needed > self.count.shape[0]:
+            capacity = max(needed, 2 * self.count.shape[0])
+            self._set_arrays([
+                np.concatenate([a, np.zeros((capacity - a.shape[0],) + a.shape[1:], a.dtype)]) for a in self._arrays()
+            ])
+        self.n_days = max(self.n_days, needed)
+
+    def append(self, batch):
+        """Add a batch of alert rows, updating only the cells of the days it covers."""
+        self._add(batch, 1)
+
+    def remove(self, batch):
+        """Subtract rows previously appended, e.g. when they age out of a live window."""
+        self._add(batch, -1)
+
+    def _add(self, batch, sign):
+        batch = apply_schema(batch)
+        with self._lock:
+            positions = [self._batch_positions(dim, batch[dim]) for dim in DIMENSIONS]
+            valid = np.logical_and.reduce([p >= 0 for p in positions])
+            days = batch['Date'].to_numpy().astype('datetime64[D]')[valid]
+            if not len(days):
+                return
+            first, last = days.min(), days.max()
+            self._ensure_days(first, last)
+            lo = int((first - self.first_day).astype(np.int64))
+            hi = int((last - self.first_day).astype(np.int64)) + 1
+
+            # Flat cell index within the batch's day span, built up one axis at a time
+            cell = (days - first).astype(np.int64)
+            for dim, pos in zip(DIMENSIONS, positions):
+                cell = cell * len(self.categories[dim]) + pos[valid]
+            cell = cell * 2 + batch['Auto-Cleared'].to_numpy()[valid]
+
+            span_shape = self.count[lo:hi].shape
+            n_cells = int(np.prod(span_shape))
+            resolution = batch['Resolution Time (hrs)'].to_numpy()[valid]
+            self.count[lo:hi] += sign * np.bincount(cell, minlength=n_cells).reshape(span_shape).astype(np.int32)
+            # Unresolved alerts (NaN) count as alerts but not towards the average resolution
+            known = ~np.isnan(resolution)
+            self.res_sum[lo:hi] += sign * np.bincount(cell[known], weights=resolution[known], minlength=n_cells).reshape(span_shape)
+            self.res_count[lo:hi] += sign * np.bincount(cell[known], minlength=n_cells).reshape(span_shape).astype(np.int32)
+            res_bin = resolution_bin_codes(resolution, bins)
+            binned = res_bin >= 0
+            res_bins = np.bincount(cell[binned] * len(labels) + res_bin[binned], minlength=n_cells * len(labels))
+            self.res_bins[lo:hi] += sign * res_bins.reshape(self.res_bins[lo:hi].shape).astype(np.int32)
+            self.version += 1
+
+    def _day_range(self, start_date, end_date):
+        start = np.datetime64(pd.Timestamp(start_date).ceil('D'), 'D')
+        end = np.datetime64(pd.Timestamp(end_date).floor('D'), 'D')
+        if self.first_day is None:
+            return 0, 0
+        lo = int(np.clip((start - self.first_day).astype(np.int64), 0, self.n_days))
+        hi = int(np.clip((end - self.first_day).astype(np.int64) + 1, lo, self.n_days))
+        return lo, hi
+
+    def _positions(self, dim, values):
+        categories = self.categories[dim]
+        if values is None:
+            return np.arange(len(categories))
+        wanted = categories.get_indexer(list(values))
+        return np.unique(wanted[wanted >= 0])
+
+    def _slice(self, array, start_date, end_date, fleets, alert_types, vessels):
+        lo, hi = self._day_range(start_date, end_date)
+        index = np.ix_(
+            np.arange(lo, hi),
+            self._positions('Fleet', fleets),
+            self._positions('Vessel', vessels),
+            self._positions('Alert Type', alert_types),
+        )
+        return lo, array[index]
+
+    def vessel_options(self, start_date, end_date, fleets, alert_types):
+        with self._lock:
+            _, count = self._slice(self.count, start_date, end_date, fleets, alert_types, None)
+            return sorted(self.categories['Vessel'][count.sum(axis=(0, 1, 3, 4)) > 0])
+
+    def query(self, start_date, end_date, fleets=None, alert_types=None, vessels=None):
+        """Dashboard aggregates for a selection, in the shape ``compute_view`` returns."""
+        with self._lock:
+            lo, count = self._slice(self.count, start_date, end_date, fleets, alert_types, vessels)
+            _, res_sum = self._slice(self.res_sum, start_date, end_date, fleets, alert_types, vessels)
+            _, res_count = self._slice(self.res_count, start_date, end_date, fleets, alert_types, vessels)
+            _, res_bins = self._slice(self.res_bins, start_date, end_date, fleets, alert_types, vessels)
+            fleet_pos = self._positions('Fleet', fleets)
+            vessel_pos = self._positions('Vessel', vessels)
+            type_pos = self._positions('Alert Type', alert_types)
+        count = count.astype(np.int64)
+        view = {}
+
+        # KPI values
+        by_status = count.sum(axis=(0, 1, 2, 3))
+        total = int(by_status.sum())
+        by_vessel = count.sum(axis=(0, 1, 3, 4))
+        view['total_alerts'] = total
+        view['vessels_with_alerts'] = int(np.count_nonzero(by_vessel))
+        view['auto_cleared_percent'] = round(by_status[1] / total * 100, 1) if total else np.nan
+        n_resolved = int(res_count.sum(dtype=np.int64))
+        view['avg_resolution'] = round(float(res_sum.sum()) / n_resolved, 2) if n_resolved else np.nan
+        view['resolved_alerts'] = int(by_status[1])
+        view['active_alerts'] = total - view['resolved_alerts']
+
+        # Alerts over time, trimmed to the first and last day with alerts
+        daily = count.sum(axis=(1, 2, 3))
+        nonzero = np.flatnonzero(daily.sum(axis=1))
+        if len(nonzero):
+            daily = daily[nonzero[0]:nonzero[-1] + 1]
+            view['alerts_time_df'] = alerts_time_frame(self.first_day + lo + nonzero[0], daily[:, 0], daily[:, 1])
+        else:
+            view['alerts_time_df'] = alerts_time_frame(np.datetime64('1970-01-01'), [], [])
+
+        # Alert Type and Fleet Breakdown
+        view['alert_type_counts'] = self._counts('Alert Type', type_pos, count.sum(axis=(0, 1, 2, 4)))
+        view['fleet_alerts'] = self._counts('Fleet', fleet_pos, count.sum(axis=(0, 2, 3, 4)))
+        view['vessel_counts'] = self._counts('Vessel', vessel_pos, by_vessel)
+
+        view['res_time_counts'] = res_time_series(res_bins.sum(axis=(0, 1, 2, 3, 4)))
+
+        pairs = count.sum(axis=(0, 1, 4))
+        view['repeat_alerts'] = pairs_frame(
+            pairs, self.categories['Vessel'][vessel_pos], self.categories['Alert Type'][type_pos],
+            ('Vessel', 'Alert Type'), min_count=REPEAT_MIN_COUNT)
+        return view
+
+    def _counts(self, dim, positions, counts):
+        # Positions are sorted, so the counts come out in category order
+        return counts_series(counts, self.categories[dim][positions], dim)
+
+
+def cube_for(df):
+    """The cube for a loaded dataset, built once and shared by every session."""
+    return _cube_cache.get_or_compute(df.attrs.get('dataset_id', id(df)), lambda: AlertCube.build(df))
+
+
+def register_cube(dataset_id, cube):
+    """Serve an externally maintained cube (e.g. a live window's) for ``dataset_id``."""
+    _cube_cache.put(dataset_id, cube)
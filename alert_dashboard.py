@@ -1,154 +1,205 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
+import os
+import time
 from datetime import datetime, timedelta
 
+from alert_data import data_source, invalidate_alerts, fleets, alert_types
+from alert_engine import PERIODS, AlertEngine, AlertFilters
+from alert_metrics import DISTINCT, REPEAT_MIN_COUNT, REPEAT_SORT_COLUMNS, TOP_K, bins, page_of, top_k, view_cache
+from alert_downsample import downsample_trend
+from alert_figures import alert_type_donut, fleet_bar, resolution_bar, top_bar, trend_area
+from alert_profiling import METRICS_FILE, PROFILE, RunProfiler
+
 # Set up page
 st.set_page_config(page_title="Alert Analytics Dashboard", layout="wide")
 
-# Simulate the dataset
-np.random.seed(42)
-base_date = pd.to_datetime("2025-01-01")
-dates = pd.date_range(start=base_date, end=base_date + pd.DateOffset(days=120))
-vessels = [f"Vessel_{i}" for i in range(1, 21)]
-fleets = ['Fleet A', 'Fleet B', 'Fleet C', 'Fleet D']
-alert_types = ['Speeding', 'Late Report', 'Excess Slip', 'Bilge ROB', 'Sludge ROB', 'AE Usage', 'Shaft Generator Usage']
-
-# Create mock alert data
-data = []
-for date in dates:
-    for _ in range(np.random.randint(5, 15)):
-        data.append({
-            'Date': date,
-            'Fleet': np.random.choice(fleets),
-            'Vessel': np.random.choice(vessels),
-            'Alert Type': np.random.choice(alert_types),
-            'Resolution Time (hrs)': round(np.random.exponential(2), 2),
-            'Auto-Cleared': np.random.choice([True, False], p=[0.6, 0.4])
-        })
-df = pd.DataFrame(data)
+# Data comes from ALERT_SOURCE: synthetic (sized by ALERT_ROWS), parquet:<dir> or live:<file.ndjson>
+source, source_params = data_source()
+engine = AlertEngine(source, **source_params)
+if source == 'live':
+    follow_live = st.sidebar.toggle("Follow live alerts", value=True)
+    refresh_secs = st.sidebar.number_input("Refresh every (s)", min_value=1, max_value=300, value=5)
+elif st.sidebar.button("Reload data"):
+    invalidate_alerts()
+
+# Load in the background while the page shell and filters render
+loading = engine.prefetch()
+
+# Dashboard Title
+st.title("🚨 Alert Analytics Dashboard")
+
+# Per-stage timings, shown in the Debug expander and appended to ALERT_METRICS_FILE
+profiler = RunProfiler(enabled=st.sidebar.checkbox("Profile runs", value=PROFILE))
 
 # Sidebar filters
 st.sidebar.header("🔎 Filters")
-period = st.sidebar.selectbox("Select Period", ["Last 7 Days", "Last 30 Days", "Quarter to Date", "Year to Date", "Custom Range"])
-today = df["Date"].max()
-
-if period == "Last 7 Days":
-    start_date = today - timedelta(days=7)
-    end_date = today
-elif period == "Last 30 Days":
-    start_date = today - timedelta(days=30)
-    end_date = today
-elif period == "Quarter to Date":
-    start_date = pd.Timestamp(today.year, (today.month - 1) // 3 * 3 + 1, 1)
-    end_date = today
-elif period == "Year to Date":
-    start_date = pd.Timestamp(today.year, 1, 1)
-    end_date = today
-else:
-    start_date = st.sidebar.date_input("Start Date", today - timedelta(days=30))
-    end_date = st.sidebar.date_input("End Date", today)
-    if isinstance(start_date, list): start_date = start_date[0]
-    if isinstance(end_date, list): end_date = end_date[0]
-
-df = df[(df['Date'] >= pd.to_datetime(start_date)) & (df['Date'] <= pd.to_datetime(end_date))]
+period = st.sidebar.selectbox("Select Period", PERIODS)
+# Custom dates need the latest alert date, so they are filled in once the data is there
+custom_range = st.sidebar.container()
 selected_fleets = st.sidebar.multiselect("Select Fleets", options=fleets, default=fleets)
-df = df[df['Fleet'].isin(selected_fleets)]
 selected_alerts = st.sidebar.multiselect("Select Alert Types", options=alert_types, default=alert_types)
-df = df[df['Alert Type'].isin(selected_alerts)]
-available_vessels = sorted(df['Vessel'].unique())
+
+with profiler.stage("latest_date"), st.spinner("Loading alerts…"):
+    today = loading.result()
+if pd.isna(today):
+    profiler.close()
+    if source != 'live':
+        st.info("No alerts to show.")
+        st.stop()
+    st.info("Waiting for live alerts…")
+    time.sleep(refresh_secs)
+    st.rerun()
+
+custom_start = custom_end = None
+if period == "Custom Range":
+    custom_start = custom_range.date_input("Start Date", today - timedelta(days=30))
+    custom_end = custom_range.date_input("End Date", today)
+    if isinstance(custom_start, list): custom_start = custom_start[0]
+    if isinstance(custom_end, list): custom_end = custom_end[0]
+
+filters = AlertFilters.for_period(period, today, custom_start, custom_end,
+                                  fleets=selected_fleets, alert_types=selected_alerts)
+
+# Cached load; Parquet reads only the selected days
+with profiler.stage("load") as stage:
+    df = engine.frame(filters)
+    stage['rows_out'] = len(df)
+with profiler.stage("vessel_options", rows_in=len(df)) as stage:
+    available_vessels = engine.vessel_options(filters)
+    stage['rows_out'] = len(available_vessels)
 selected_vessels = st.sidebar.multiselect("Select Vessels", options=available_vessels, default=available_vessels)
-df = df[df['Vessel'].isin(selected_vessels)]
+# Every vessel with alerts selected filters nothing, and leaves approximate counts usable
+vessel_filter = None if set(selected_vessels) >= set(available_vessels) else selected_vessels
+approx_vessels = st.sidebar.toggle("Approximate vessel counts", value=DISTINCT == 'approx',
+                                   help="Estimate Vessels With Alerts from HyperLogLog sketches")
+
+# Filtered frame and every aggregate below are memoized per selection
+with profiler.stage("aggregate", rows_in=len(df)) as stage:
+    result = engine.query(filters.with_vessels(vessel_filter), distinct='approx' if approx_vessels else 'exact')
+    stage['rows_out'] = result.kpis.total_alerts
+cache_stats = view_cache.stats()
+st.sidebar.caption(f"View cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                   f"{cache_stats['entries']} entries, {cache_stats['nbytes'] / 1e6:.1f} MB")
 
 # KPI values
-total_alerts = len(df)
-vessels_with_alerts = df['Vessel'].nunique()
-auto_cleared_percent = round(df['Auto-Cleared'].mean() * 100, 1)
-avg_resolution = round(df['Resolution Time (hrs)'].mean(), 2)
-active_alerts = len(df[~df['Auto-Cleared']])
-resolved_alerts = len(df[df['Auto-Cleared']])
+kpis = result.kpis
+total_alerts = kpis.total_alerts
+vessels_with_alerts = kpis.vessels_with_alerts
+auto_cleared_percent = kpis.auto_cleared_percent
+avg_resolution = kpis.avg_resolution
+active_alerts = kpis.active_alerts
+resolved_alerts = kpis.resolved_alerts
 
 # Alerts over time
-alerts_time_df = df.groupby("Date").size().reset_index(name="Total Alerts")
-active_df = df[~df['Auto-Cleared']].groupby("Date").size().reset_index(name="Active Alerts")
-resolved_df = df[df['Auto-Cleared']].groupby("Date").size().reset_index(name="Resolved Alerts")
-alerts_time_df = alerts_time_df.merge(active_df, on="Date", how="left").merge(resolved_df, on="Date", how="left").fillna(0)
-
-# Dashboard Title
-st.title("🚨 Alert Analytics Dashboard")
+alerts_time_df = result.alerts_time_df
 
 # KPI Cards
 col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric("Total Alerts", f"{total_alerts:,}")
     st.markdown(f"<span style='font-size:13px;'>Active: {active_alerts:,} &nbsp;&nbsp;&nbsp;&nbsp; Resolved: {resolved_alerts:,}</span>", unsafe_allow_html=True)
-col2.metric("Vessels With Alerts", f"{vessels_with_alerts:,}")
+col2.metric("Vessels With Alerts", f"{'~' if approx_vessels and vessel_filter is None else ''}{vessels_with_alerts:,}")
 col3.metric("Auto-Cleared Alerts", f"{auto_cleared_percent}%")
 col4.metric("Avg Resolution", f"{avg_resolution} hrs")
 
-# Alert Type and Fleet Breakdown
-alert_type_counts = df['Alert Type'].value_counts()
-fleet_alerts = df['Fleet'].value_counts()
+# Alert Type and Fleet Breakdown; views keep counts in category order, the charts show them ranked
+alert_type_counts = result.alert_type_counts
+fleet_alerts = top_k(result.fleet_alerts, None)
 
 col5, col6 = st.columns(2)
-with col5:
+with col5, profiler.stage("render_donut", rows_in=len(alert_type_counts)):
     st.markdown("###  Alert Type Distribution")
-    fig_donut = go.Figure(data=[go.Pie(labels=alert_type_counts.index,
-                                       values=alert_type_counts.values,
-                                       hole=0.55,
-                                       textinfo='label+percent')])
-    fig_donut.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0))
+    fig_donut = alert_type_donut(top_k(alert_type_counts, None))
     st.plotly_chart(fig_donut, use_container_width=True)
 
-with col6:
+with col6, profiler.stage("render_fleets", rows_in=len(fleet_alerts)):
     st.markdown("### Fleet Comparison")
-    fig3 = px.bar(x=fleet_alerts.values, y=fleet_alerts.index, orientation='h', labels={'x': 'Alerts', 'y': 'Fleet'})
-    fig3.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0))
+    fig3 = fleet_bar(fleet_alerts)
     st.plotly_chart(fig3, use_container_width=True)
 
-# Area Chart
+# Area Chart, downsampled to about one point per couple of pixels
+TREND_WIDTH_PX = int(os.environ.get("ALERT_TREND_WIDTH_PX", 1200))
 st.markdown("###  Alert Trend ")
-fig_area = px.area(alerts_time_df, x='Date',
-                   y=['Active Alerts', 'Resolved Alerts'],
-                   labels={'value': 'Number of Alerts', 'variable': 'Alert Status'},
-                   color_discrete_map={'Active Alerts': '#EF553B', 'Resolved Alerts': '#00CC96'})
-fig_area.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0), legend=dict(orientation="h", y=1.02, x=1))
-st.plotly_chart(fig_area, use_container_width=True)
+trend_modes = {"Bucketed": 'sum', "Spike-preserving (LTTB)": 'lttb', "Min/max envelope": 'minmax'}
 
-# Alert Type and Fleet Breakdown
-alert_type_counts = df['Alert Type'].value_counts()
-fleet_alerts = df['Fleet'].value_counts()
 
+# A fragment, so switching the sampling mode reruns this chart only
+@st.fragment
+def trend_chart(alerts_time_df):
+    trend_mode = st.radio("Trend sampling", list(trend_modes), horizontal=True, label_visibility="collapsed")
+    trend_df = downsample_trend(alerts_time_df, TREND_WIDTH_PX, trend_modes[trend_mode])
+    fig_area = trend_area(trend_df)
+    st.plotly_chart(fig_area, use_container_width=True)
+
+
+with profiler.stage("render_trend", rows_in=len(alerts_time_df)):
+    trend_chart(alerts_time_df)
 
 # Resolution Time Distribution
-bins = [0, 0.25, 1, 3, 6, 12, np.inf]
-labels = ['0–15 min', '15–60 m', '1–3 hrs', '3–6 hrs', '6–12 hrs', '> 12 hrs']
-df['ResBin'] = pd.cut(df['Resolution Time (hrs)'], bins=bins, labels=labels, include_lowest=True)
-res_time_counts = df['ResBin'].value_counts().sort_index()
+res_time_counts = result.res_time_counts
 st.markdown("### ⏱️ Resolution Time Distribution")
-fig4 = px.bar(x=res_time_counts.index, y=res_time_counts.values, labels={'x': 'Resolution Time', 'y': 'Number of Alerts'})
-fig4.update_layout(height=300, margin=dict(l=0, r=0, t=30, b=0))
-st.plotly_chart(fig4, use_container_width=True)
-
+edges_text = st.text_input("Bin edges (hrs)", value=", ".join(f"{edge:g}" for edge in bins),
+                           help="Comma-separated, increasing; inf leaves the last bin open")
+try:
+    edges = [float(edge) for edge in edges_text.split(",")]
+    if edges != list(bins):
+        res_time_counts = engine.resolution_histogram(result.filters, edges)
+except ValueError:
+    st.warning("Bin edges must be increasing numbers; showing the default bins.")
+with profiler.stage("render_resolution", rows_in=len(res_time_counts)):
+    fig4 = resolution_bar(res_time_counts)
+    st.plotly_chart(fig4, use_container_width=True)
+
+# Resolution percentiles, merged from per-day sketches instead of scanning alerts
+with profiler.stage("percentiles"):
+    res_percentiles = engine.percentiles(result.filters)
+    percentiles_by = {by: engine.percentiles(result.filters, by=by) for by in ('Fleet', 'Alert Type')}
+for col, (name, value) in zip(st.columns(len(res_percentiles)), res_percentiles.items()):
+    col.metric(f"{name} Resolution", "–" if pd.isna(value) else f"{value:.2f} hrs")
+with st.expander("Resolution percentiles by fleet and alert type"):
+    for by, table in percentiles_by.items():
+        st.dataframe(table.round(2))
+
+# Top N panels reuse the donut's and the vessel counts, picking the largest without a full sort
+top_n = st.sidebar.number_input("Top N", min_value=1, max_value=50, value=TOP_K)
 colC, colD = st.columns(2)
-with colC:
-    st.markdown("###  Top 5 Alert Types")
-    top_alerts = df['Alert Type'].value_counts().head(5)
-    fig = px.bar(top_alerts, x=top_alerts.values, y=top_alerts.index,
-                 orientation='h', labels={'x': 'Count', 'index': 'Alert Type'})
+with colC, profiler.stage("render_top_alert_types", rows_in=len(alert_type_counts)):
+    st.markdown(f"###  Top {top_n} Alert Types")
+    top_alerts = top_k(alert_type_counts, top_n)
+    fig = top_bar(top_alerts, 'Alert Type')
     st.plotly_chart(fig, use_container_width=True)
 
-with colD:
-    st.markdown("### Top 5 Vessels with Most Alerts")
-    top_vessels = df['Vessel'].value_counts().head(5)
-    fig = px.bar(top_vessels, x=top_vessels.values, y=top_vessels.index,
-                 orientation='h', labels={'x': 'Count', 'index': 'Vessel'})
+with colD, profiler.stage("render_top_vessels", rows_in=len(result.vessel_counts)):
+    st.markdown(f"### Top {top_n} Vessels with Most Alerts")
+    top_vessels = top_k(result.vessel_counts, top_n)
+    fig = top_bar(top_vessels, 'Vessel')
     st.plotly_chart(fig, use_container_width=True)
 
 
-st.markdown("###  Repeat Alerts (>=3) per Vessel & Type")
-repeat_alerts = df.groupby(['Vessel', 'Alert Type']).size().reset_index(name='Count')
-repeat_alerts = repeat_alerts[repeat_alerts['Count'] >= 3]
-st.dataframe(repeat_alerts.sort_values(by='Count', ascending=False))
+# Sorted once per selection and threshold; only the visible page is sent to the browser
+REPEAT_PAGE_ROWS = 50
+repeat_header = st.empty()
+colR1, colR2, colR3, colR4 = st.columns(4)
+min_repeat = colR1.number_input("Min alerts per pair", min_value=1, value=REPEAT_MIN_COUNT)
+repeat_sort = colR2.selectbox("Sort by", REPEAT_SORT_COLUMNS)
+repeat_desc = colR3.toggle("Descending", value=repeat_sort == 'Count')
+repeat_alerts = engine.repeat_alerts(result.filters, min_count=min_repeat, sort_by=repeat_sort, ascending=not repeat_desc)
+n_repeat_pages = max(-(-len(repeat_alerts) // REPEAT_PAGE_ROWS), 1)
+repeat_page = colR4.number_input("Page", min_value=1, max_value=n_repeat_pages, value=1)
+repeat_header.markdown(f"###  Repeat Alerts (>={min_repeat}) per Vessel & Type")
+with profiler.stage("render_repeat_alerts", rows_in=len(repeat_alerts)):
+    page, repeat_page, _ = page_of(repeat_alerts, repeat_page, REPEAT_PAGE_ROWS)
+    st.dataframe(page, hide_index=True)
+    st.caption(f"{len(repeat_alerts):,} pairs · page {repeat_page} of {n_repeat_pages}")
+
+if profiler.enabled:
+    profiler.finish(source=source, period=period, rows=len(df))
+    with st.expander("Debug: run profile"):
+        st.caption(f"Run took {profiler.total_seconds * 1e3:.0f} ms; profiles are appended to {os.path.abspath(METRICS_FILE)}")
+        st.dataframe(profiler.frame(), hide_index=True)
+
+# Pick up newly arrived alerts on the next run
+if source == 'live' and follow_live:
+    time.sleep(refresh_secs)
+    st.rerun()
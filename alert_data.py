@@ -0,0 +1,160 @@
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from alert_cache import LRUCache
+from alert_filters import mark_sorted
+from alert_metrics import resolution_codes
+from alert_schema import apply_schema, fleets, vessels, alert_types
+
+# Simulated alert feed
+BASE_DATE = pd.Timestamp("2025-01-01")
+DAYS = 121
+
+AUTO_CLEAR_P = 0.6
+MEAN_RESOLUTION_HRS = 2
+
+# Loaded datasets are shared by every session in the server process
+DATA_CACHE_TTL = float(os.environ.get("ALERT_DATA_TTL", 600))
+DATA_CACHE_SIZE = 4
+_dataset_cache = LRUCache(maxsize=DATA_CACHE_SIZE, ttl=DATA_CACHE_TTL)
+_dataset_ids = itertools.count(1)
+_prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert-prefetch')
+
+
+def generate_alerts(n_rows=None, seed=42, days=DAYS, base_date=BASE_DATE):
+    """Build the mock alert frame with one NumPy call per column.
+
+    With ``n_rows=None`` every day gets 5-14 alerts like the original
+    simulation; otherwise ``n_rows`` alerts are spread evenly over ``days``.
+    Rows come out sorted by ``Date`` and already carry the compact
+    categorical schema, so no strings are ever materialized.
+    """
+    rng = np.random.default_rng(seed)
+    if n_rows is None:
+        per_day = rng.integers(5, 15, size=days)
+    else:
+        per_day = rng.multinomial(n_rows, np.full(days, 1 / days))
+    day_offsets = np.repeat(np.arange(days, dtype=np.int64), per_day)
+    n = len(day_offsets)
+
+    dates = np.datetime64(pd.Timestamp(base_date).normalize(), 'D') + day_offsets
+    return pd.DataFrame({
+        'Date': dates.astype('datetime64[ns]'),
+        'Fleet': pd.Categorical.from_codes(rng.integers(0, len(fleets), size=n, dtype=np.int8), fleets),
+        'Vessel': pd.Categorical.from_codes(rng.integers(0, len(vessels), size=n, dtype=np.int8), vessels),
+        'Alert Type': pd.Categorical.from_codes(rng.integers(0, len(alert_types), size=n, dtype=np.int8), alert_types),
+        'Resolution Time (hrs)': np.round(rng.exponential(MEAN_RESOLUTION_HRS, size=n), 2).astype(np.float32),
+        'Auto-Cleared': rng.random(n) < AUTO_CLEAR_P,
+    })
+
+
+def generate_alerts_loop(seed=42, days=DAYS, base_date=BASE_DATE):
+    """The original per-row simulation, kept as a reference for benchmarks."""
+    np.random.seed(seed)
+    dates = pd.date_range(start=base_date, periods=days)
+    data = []
+    for date in dates:
+        for _ in range(np.random.randint(5, 15)):
+            data.append({
+                'Date': date,
+                'Fleet': np.random.choice(fleets),
+                'Vessel': np.random.choice(vessels),
+                'Alert Type': np.random.choice(alert_types),
+                'Resolution Time (hrs)': round(np.random.exponential(2), 2),
+                'Auto-Cleared': np.random.choice([True, False], p=[0.6, 0.4])
+            })
+    return pd.DataFrame(data)
+
+
+def _read_parquet(path, **filters):
+    from alert_store import read_alerts
+    return read_alerts(path, **filters)
+
+
+LOADERS = {
+    'synthetic': generate_alerts,
+    'parquet': _read_parquet,
+}
+
+# Sources that can apply the sidebar filters while reading
+PUSHDOWN_SOURCES = {'parquet'}
+
+
+def data_source():
+    """Source and loader parameters from ``ALERT_SOURCE``.
+
+    ``synthetic`` (the default, sized by ``ALERT_ROWS``), ``parquet:<dir>``
+    or ``live:<file.ndjson>``.
+    """
+    spec = os.environ.get("ALERT_SOURCE", "synthetic")
+    if spec.startswith("parquet:"):
+        return 'parquet', {'path': spec.split(":", 1)[1]}
+    if spec.startswith("live:"):
+        return 'live', {'path': spec.split(":", 1)[1]}
+    rows = int(os.environ["ALERT_ROWS"]) if os.environ.get("ALERT_ROWS") else None
+    return 'synthetic', {'n_rows': rows, 'seed': 42}
+
+
+def load_alerts(source='synthetic', filters=None, **params):
+    """Return the alert frame for ``source``, loading it at most once per TTL.
+
+    ``filters`` (start_date, end_date, fleets, alert_types, vessels) are
+    pushed into the read for sources that support it and ignored otherwise,
+    so callers still filter the result in memory. Each distinct ``filters``
+    is a separate cached load with its own ``dataset_id``, so push down only
+    what changes rarely (the period), not the multiselects.
+
+    The result is shared between sessions, so callers must not modify it.
+    Each load is sorted by Date and stamped with a fresh
+    ``attrs['dataset_id']`` so caches of derived results can tell a reload
+    apart from the frame it replaced.
+
+    The ``live`` source bypasses the cache and returns the current snapshot
+    of its rolling window.
+    """
+    if source == 'live':
+        from alert_stream import live_alerts
+        return live_alerts(params['path']).snapshot()
+    if source not in PUSHDOWN_SOURCES or not filters:
+        filters = {}
+    filters = {k: tuple(sorted(v)) if isinstance(v, (list, set, tuple)) else v
+               for k, v in filters.items() if v is not None}
+
+    def load():
+        df = mark_sorted(apply_schema(LOADERS[source](**params, **filters)))
+        df.attrs['dataset_id'] = next(_dataset_ids)
+        # Bin resolution times once at load; every histogram after that is a bincount
+        resolution_codes(df)
+        return df
+
+    key = (source, tuple(sorted(params.items())), tuple(sorted(filters.items())))
+    return _dataset_cache.get_or_compute(key, load)
+
+
+def latest_alert_date(source='synthetic', **params):
+    """The "today" anchor for the period selector."""
+    if source == 'parquet':
+        from alert_store import latest_date
+        return latest_date(params['path'])
+    return load_alerts(source, **params)['Date'].max()  # NaT while a live window is empty
+
+
+def prefetch_alerts(source='synthetic', **params):
+    """Start loading ``source`` on a background thread; a Future of :func:`latest_alert_date`.
+
+    Lets the page render its shell while the dataset loads. Concurrent loads
+    of the same dataset share one computation through the dataset cache.
+    """
+    return _prefetch_pool.submit(latest_alert_date, source, **params)
+
+
+def invalidate_alerts(source=None):
+    """Forget cached datasets, either for one source or all of them."""
+    if source is None:
+        _dataset_cache.invalidate()
+    else:
+        _dataset_cache.invalidate(where=lambda key: key[0] == source)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+# Bucket sizes the trend can be resampled to, finest first
+BUCKETS = [('h', pd.Timedelta(hours=1)), ('D', pd.Timedelta(days=1)), ('W', pd.Timedelta(weeks=1)), ('MS', pd.Timedelta(days=30))]
+
+# Leave a couple of pixels per point so the area chart stays readable
+PX_PER_POINT = 2
+
+SERIES = ['Active Alerts', 'Resolved Alerts']
+
+
+def choose_bucket(start_date, end_date, width_px, base='D'):
+    """Smallest bucket, no finer than ``base``, that fits the range into ``width_px``."""
+    span = pd.Timestamp(end_date) - pd.Timestamp(start_date)
+    max_points = max(width_px // PX_PER_POINT, 1)
+    names = [name for name, _ in BUCKETS]
+    for name, size in BUCKETS[names.index(base):]:
+        if span / size <= max_points:
+            return name
+    return BUCKETS[-1][0]
+
+
+def resample_trend(trend, freq):
+    """Sum the per-day trend into ``freq`` buckets; Total stays Active + Resolved.
+
+    Buckets are labelled with their first day, so no point is dated after
+    the latest alert (weekly bins otherwise close and label on Sunday).
+    """
+    if not len(trend):
+        return trend
+    out = trend.resample(freq, on='Date', label='left', closed='left')[SERIES].sum().reset_index()
+    out.insert(1, 'Total Alerts', out['Active Alerts'] + out['Resolved Alerts'])
+    return out
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: positions of ``n_out`` points that keep the shape of ``y``."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (n_out - 2)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = int(i * every) + 1, int((i + 1) * every) + 1
+        # Average of the next bucket (the last point, at the end) is the third triangle vertex
+        nlo, nhi = (hi, min(int((i + 2) * every) + 1, n)) if i < n_out - 3 else (n - 1, n)
+        cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax_indices(y, n_buckets):
+    """Positions of the minimum and maximum of ``y`` in each of ``n_buckets`` buckets, plus both ends."""
+    n = len(y)
+    if 2 * n_buckets >= n:
+        return np.arange(n)
+    y = np.asarray(y)
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    keep = {0, n - 1}
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            keep.add(lo + int(np.argmin(y[lo:hi])))
+            keep.add(lo + int(np.argmax(y[lo:hi])))
+    return np.array(sorted(keep), dtype=np.int64)
+
+
+def downsample_trend(trend, width_px, mode='sum', base='D'):
+    """Trend frame sized for a chart ``width_px`` pixels wide.
+
+    ``sum`` resamples to the bucket picked by :func:`choose_bucket`. ``lttb``
+    and ``minmax`` keep the original points that preserve spikes. Points are
+    picked on the Total series and the same rows are kept for Active and
+    Resolved, so the stacked series always add up.
+    """
+    if not len(trend):
+        return trend
+    max_points = max(width_px // PX_PER_POINT, 3)
+    if mode == 'sum':
+        freq = choose_bucket(trend['Date'].iloc[0], trend['Date'].iloc[-1], width_px, base)
+        return trend if freq == base else resample_trend(trend, freq)
+    total = trend['Total Alerts'].to_numpy()
+    if mode == 'lttb':
+        keep = lttb_indices(trend['Date'].to_numpy().astype(np.int64), total, max_points)
+    elif mode == 'minmax':
+        keep = minmax_indices(total, (max_points - 2) // 2)
+    else:
+        raise ValueError(f"Unknown downsampling mode: {mode!r}")
+    return trend.iloc[keep].reset_index(drop=True)
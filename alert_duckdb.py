@@ -0,0 +1,178 @@
+"""DuckDB engine for the dashboard aggregates (requires duckdb).
+
+``compute_view_duckdb`` returns the same dict as ``alert_metrics.compute_view``
+for the same selection, with identical values, dtypes and ordering, so the
+engines can be swapped with ``ALERT_ENGINE=duckdb``. The source can be the
+in-memory alert frame, a pyarrow Table or a Parquet store directory written
+by ``alert_store``.
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from alert_schema import CATEGORIES
+
+# Worker threads per query; DuckDB's default is one per core
+THREADS = os.environ.get("ALERT_DUCKDB_THREADS")
+
+_database = None
+_database_lock = threading.Lock()
+_local = threading.local()
+
+
+def _connection():
+    """Per-thread cursor on one shared in-memory database."""
+    cursor = getattr(_local, 'cursor', None)
+    if cursor is None:
+        global _database
+        with _database_lock:
+            if _database is None:
+                try:
+                    import duckdb
+                except ImportError as e:
+                    raise ImportError("The DuckDB engine needs duckdb: pip install duckdb") from e
+                _database = duckdb.connect(':memory:')
+                if THREADS:
+                    _database.execute(f"SET threads TO {int(THREADS)}")
+        cursor = _local.cursor = _database.cursor()
+    return cursor
+
+
+def _relation_sql(con, source):
+    """Register ``source`` and return the SQL to select from it."""
+    if isinstance(source, (str, os.PathLike)):
+        path = os.path.join(os.fspath(source), '**', '*.parquet').replace("'", "''")
+        return f"read_parquet('{path}', hive_partitioning = true)"
+    con.register('alerts_src', source)
+    return 'alerts_src'
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _list_literal(values):
+    return "[" + ", ".join(_literal(v) for v in values) + "]::VARCHAR[]"
+
+
+def _category_order(column, expr):
+    """SQL expression ranking ``expr`` by the fixed category order of ``column``."""
+    return f"list_position({_list_literal(CATEGORIES[column])}, {expr})"
+
+
+def compute_view_duckdb(source, start_date, end_date, fleets=None, alert_types=None, vessels=None):
+    """Dashboard aggregates for a selection, computed in DuckDB."""
+    from alert_metrics import REPEAT_MIN_COUNT, alerts_time_frame, bins, labels
+
+    con = _connection()
+    # Views cannot take prepared parameters, so the selection is inlined as escaped literals
+    where = [
+        f'"Date" >= TIMESTAMP {_literal(pd.Timestamp(start_date))}',
+        f'"Date" <= TIMESTAMP {_literal(pd.Timestamp(end_date))}',
+    ]
+    for column, values in (('Fleet', fleets), ('Alert Type', alert_types), ('Vessel', vessels)):
+        if values is not None:
+            where.append(f'list_contains({_list_literal(values)}, CAST("{column}" AS VARCHAR))')
+    con.execute(f"""
+        CREATE OR REPLACE TEMP VIEW selected AS
+        SELECT CAST("Date" AS TIMESTAMP) AS "Date", "Fleet", "Vessel", "Alert Type",
+               "Resolution Time (hrs)" AS res, "Auto-Cleared" AS auto
+        FROM {_relation_sql(con, source)}
+        WHERE {' AND '.join(where)}
+    """)
+
+    view = {}
+
+    # KPI values
+    total, vessels_n, resolved, mean_auto, mean_res = con.execute("""
+        SELECT count(*), count(DISTINCT "Vessel"), count(*) FILTER (WHERE auto),
+               avg(CAST(auto AS DOUBLE)), avg(CAST(res AS DOUBLE))
+        FROM selected
+    """).fetchone()
+    view['total_alerts'] = int(total)
+    view['vessels_with_alerts'] = int(vessels_n)
+    view['auto_cleared_percent'] = round(_nan(mean_auto) * 100, 1)
+    view['avg_resolution'] = round(_nan(mean_res), 2)
+    view['resolved_alerts'] = int(resolved)
+    view['active_alerts'] = view['total_alerts'] - view['resolved_alerts']
+
+    # Alerts over time, densified over the same day range as the pandas path
+    daily = con.execute("""
+        SELECT CAST("Date" AS DATE) AS day, count(*) FILTER (WHERE NOT auto) AS active,
+               count(*) FILTER (WHERE auto) AS resolved
+        FROM selected GROUP BY 1 ORDER BY 1
+    """).df()
+    if len(daily):
+        days = daily['day'].to_numpy().astype('datetime64[D]')
+        offsets = (days - days[0]).astype(np.int64)
+        active = np.zeros(offsets[-1] + 1, dtype=np.int64)
+        resolved = np.zeros(offsets[-1] + 1, dtype=np.int64)
+        active[offsets] = daily['active']
+        resolved[offsets] = daily['resolved']
+        view['alerts_time_df'] = alerts_time_frame(days[0], active, resolved)
+    else:
+        view['alerts_time_df'] = alerts_time_frame(np.datetime64('1970-01-01'), [], [])
+
+    # Alert Type and Fleet Breakdown
+    for key, column in (('alert_type_counts', 'Alert Type'), ('fleet_alerts', 'Fleet'), ('vessel_counts', 'Vessel')):
+        counts = con.execute(f"""
+            SELECT CAST("{column}" AS VARCHAR) AS label, count(*) AS n
+            FROM selected WHERE "{column}" IS NOT NULL GROUP BY 1
+        """).df()
+        view[key] = _category_counts(counts['label'], counts['n'], column)
+
+    # Resolution Time Distribution; the first bin includes its lower edge like pd.cut(include_lowest=True)
+    cases = " ".join(f"WHEN res <= {edge} THEN {i}" for i, edge in enumerate(bins[1:-1]))
+    binned = con.execute(f"""
+        SELECT CASE WHEN res < {bins[0]} THEN NULL {cases} ELSE {len(labels) - 1} END AS bin, count(*) AS n
+        FROM selected WHERE res IS NOT NULL GROUP BY 1
+    """).fetchall()
+    res_counts = np.zeros(len(labels), dtype=np.int64)
+    for b, n in binned:
+        if b is not None:
+            res_counts[b] = n
+    index = pd.CategoricalIndex(labels, categories=labels, ordered=True, name='Resolution Time (hrs)')
+    view['res_time_counts'] = pd.Series(res_counts, index=index, name='count')
+
+    repeat = con.execute(f"""
+        SELECT * FROM (
+            SELECT CAST("Vessel" AS VARCHAR) AS vessel, CAST("Alert Type" AS VARCHAR) AS alert_type, count(*) AS n
+            FROM selected GROUP BY 1, 2 HAVING count(*) >= {REPEAT_MIN_COUNT}
+        )
+        ORDER BY {_category_order('Vessel', 'vessel')} NULLS LAST, vessel,
+                 {_category_order('Alert Type', 'alert_type')} NULLS LAST, alert_type
+    """).df()
+    view['repeat_alerts'] = pd.DataFrame({
+        'Vessel': _labels(repeat['vessel'], 'Vessel'),
+        'Alert Type': _labels(repeat['alert_type'], 'Alert Type'),
+        'Count': repeat['n'].to_numpy(np.int64),
+    })
+
+    con.execute("DROP VIEW selected")
+    if not isinstance(source, (str, os.PathLike)):
+        con.unregister('alerts_src')
+    return view
+
+
+def _category_counts(labels, counts, column):
+    """Per-label counts scattered into category order, as ``alert_metrics.counts_series`` returns them."""
+    from alert_metrics import counts_series
+
+    known = pd.Index(CATEGORIES[column])
+    labels = pd.Index(labels.tolist(), dtype=known.dtype)
+    # Labels outside the fixed categories follow them sorted, like alert_schema.categorical
+    categories = known.append(pd.Index(sorted(labels[known.get_indexer(labels) < 0]), dtype=known.dtype))
+    dense = np.zeros(len(categories), dtype=np.int64)
+    dense[categories.get_indexer(labels)] = counts.to_numpy(np.int64)
+    return counts_series(dense, categories, column)
+
+
+def _labels(values, column, name=None):
+    """Index of category labels with the same dtype the pandas path produces."""
+    return pd.Index(values.tolist(), dtype=pd.Index(CATEGORIES[column]).dtype, name=name)
+
+
+def _nan(value):
+    return np.nan if value is None else value
@@ -0,0 +1,169 @@
+"""Headless dashboard aggregates: filters in, result dataclasses out.
+
+The Streamlit page is a renderer on top of :class:`AlertEngine`; batch jobs,
+benchmarks and services can use the same cached code path without
+Streamlit::
+
+    engine = AlertEngine()
+    filters = AlertFilters.for_period("Last 30 Days", engine.latest_date())
+    result = engine.query(filters)
+    result.kpis.total_alerts
+"""
+from dataclasses import asdict, dataclass, fields, replace
+from datetime import timedelta
+
+import pandas as pd
+
+from alert_data import alert_types, data_source, fleets, latest_alert_date, load_alerts, prefetch_alerts
+from alert_metrics import REPEAT_MIN_COUNT, bins, dashboard_view, repeat_alerts, resolution_histogram, vessel_options
+from alert_quantiles import PERCENTILES, resolution_percentiles
+
+PERIODS = ["Last 7 Days", "Last 30 Days", "Quarter to Date", "Year to Date", "Custom Range"]
+
+
+def period_range(period, today, start_date=None, end_date=None):
+    """``(start_date, end_date)`` of a sidebar period ending ``today``.
+
+    ``Custom Range`` uses ``start_date`` and ``end_date`` as given,
+    defaulting to the last 30 days.
+    """
+    if period == "Last 7 Days":
+        return today - timedelta(days=7), today
+    if period == "Last 30 Days":
+        return today - timedelta(days=30), today
+    if period == "Quarter to Date":
+        return pd.Timestamp(today.year, (today.month - 1) // 3 * 3 + 1, 1), today
+    if period == "Year to Date":
+        return pd.Timestamp(today.year, 1, 1), today
+    if period == "Custom Range":
+        return (today - timedelta(days=30) if start_date is None else start_date,
+                today if end_date is None else end_date)
+    raise ValueError(f"Unknown period: {period!r}")
+
+
+@dataclass(frozen=True)
+class AlertFilters:
+    """A sidebar selection. ``vessels=None`` keeps every vessel."""
+
+    start_date: pd.Timestamp
+    end_date: pd.Timestamp
+    fleets: tuple = tuple(fleets)
+    alert_types: tuple = tuple(alert_types)
+    vessels: tuple = None
+
+    def __post_init__(self):
+        object.__setattr__(self, 'start_date', pd.Timestamp(self.start_date))
+        object.__setattr__(self, 'end_date', pd.Timestamp(self.end_date))
+        for name in ('fleets', 'alert_types', 'vessels'):
+            values = getattr(self, name)
+            if values is not None:
+                object.__setattr__(self, name, tuple(values))
+
+    @classmethod
+    def for_period(cls, period, today, start_date=None, end_date=None, **selection):
+        return cls(*period_range(period, today, start_date, end_date), **selection)
+
+    def with_vessels(self, vessels):
+        return replace(self, vessels=vessels)
+
+    def selection(self):
+        """Keyword arguments for the aggregate functions."""
+        return dict(start_date=self.start_date, end_date=self.end_date,
+                    fleets=self.fleets, alert_types=self.alert_types, vessels=self.vessels)
+
+
+@dataclass(frozen=True)
+class KPIs:
+    total_alerts: int
+    active_alerts: int
+    resolved_alerts: int
+    vessels_with_alerts: int
+    auto_cleared_percent: float
+    avg_resolution: float
+
+
+@dataclass(frozen=True)
+class DashboardResult:
+    """Every aggregate the dashboard shows for one selection.
+
+    The frames and series are shared with the view cache, so callers must
+    not modify them. Per-label counts are in category order; rank them
+    with :func:`alert_metrics.top_k`.
+    """
+
+    filters: AlertFilters
+    kpis: KPIs
+    alerts_time_df: pd.DataFrame
+    alert_type_counts: pd.Series
+    fleet_alerts: pd.Series
+    vessel_counts: pd.Series
+    res_time_counts: pd.Series
+    repeat_alerts: pd.DataFrame
+
+    @classmethod
+    def from_view(cls, filters, view):
+        # Engines return NumPy or Python scalars; the KPIs are plain Python ones
+        kpis = KPIs(**{f.name: f.type(view[f.name]) for f in fields(KPIs)})
+        return cls(filters, kpis, **{f.name: view[f.name] for f in fields(cls) if f.name not in ('filters', 'kpis')})
+
+    def kpi_dict(self):
+        return asdict(self.kpis)
+
+
+class AlertEngine:
+    """Cached loads and aggregates of one alert source.
+
+    ``source`` and its parameters default to ``ALERT_SOURCE``; ``engine``
+    picks the aggregation engine (``ALERT_ENGINE`` by default) and
+    ``distinct`` exact or approximate vessel counts (``ALERT_DISTINCT``).
+    """
+
+    def __init__(self, source=None, engine=None, distinct=None, **params):
+        if source is None:
+            source, params = data_source()
+        self.source = source
+        self.params = params
+        self.engine = engine
+        self.distinct = distinct
+
+    def latest_date(self):
+        """The "today" anchor for periods; NaT while a live window is empty."""
+        return latest_alert_date(self.source, **self.params)
+
+    def prefetch(self):
+        """Future of :meth:`latest_date`, loading the source in the background."""
+        return prefetch_alerts(self.source, **self.params)
+
+    def frame(self, filters):
+        """The loaded alert frame; Parquet reads only the selected days.
+
+        Only the period is pushed down: each pushed-down selection is a load
+        of its own, with its own cube, bitmaps, sketches and view cache
+        entries. The multiselects are served from those, so switching
+        between fleets or alert types never goes back to disk.
+        """
+        pushdown = dict(start_date=filters.start_date, end_date=filters.end_date)
+        return load_alerts(self.source, filters=pushdown, **self.params)
+
+    def vessel_options(self, filters):
+        """Vessels with alerts in the period, fleets and alert types of ``filters``."""
+        return vessel_options(self.frame(filters), filters.start_date, filters.end_date,
+                              filters.fleets, filters.alert_types, engine=self.engine)
+
+    def query(self, filters, distinct=None):
+        view = dashboard_view(self.frame(filters), engine=self.engine, distinct=distinct or self.distinct,
+                              **filters.selection())
+        return DashboardResult.from_view(filters, view)
+
+    def repeat_alerts(self, filters, min_count=REPEAT_MIN_COUNT, sort_by='Count', ascending=False):
+        """Sorted vessel/alert type pairs with ``min_count`` or more alerts; page with ``alert_metrics.page_of``."""
+        return repeat_alerts(self.frame(filters), min_count=min_count, sort_by=sort_by, ascending=ascending,
+                             engine=self.engine, **filters.selection())
+
+    def resolution_histogram(self, filters, edges=bins):
+        """Resolution Time Distribution over custom bin ``edges``; ValueError if they are not increasing."""
+        return resolution_histogram(self.frame(filters), edges=edges, **filters.selection())
+
+    def percentiles(self, filters, qs=PERCENTILES, by=None):
+        """Resolution time percentiles, overall or per ``by`` (Fleet or Alert Type)."""
+        return resolution_percentiles(self.frame(filters), qs=qs, by=by, **filters.selection())
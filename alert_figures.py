@@ -0,0 +1,88 @@
+import hashlib
+
+import pandas as pd
+
+from alert_cache import LRUCache
+
+# Built figures keyed on a digest of the aggregates they plot, shared by every session
+figure_cache = LRUCache(maxsize=64)
+
+COMPACT = dict(height=300, margin=dict(l=0, r=0, t=30, b=0))
+
+
+def digest(data):
+    """Content hash of a Series or DataFrame, including its index and labels."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    names = list(data.columns) if isinstance(data, pd.DataFrame) else [data.name]
+    h.update(repr((names, data.index.name, str(data.index.dtype))).encode())
+    return h.hexdigest()
+
+
+def cached_figure(name, data, build, *params):
+    """Figure ``build(data, *params)``, rebuilt only when ``data`` or ``params`` change."""
+    return figure_cache.get_or_compute((name, digest(data)) + params, lambda: build(data, *params))
+
+
+# Plotly is imported by the first chart built, not when the page starts
+
+
+def _donut(counts):
+    import plotly.graph_objects as go
+
+    fig = go.Figure(data=[go.Pie(labels=counts.index, values=counts.values, hole=0.55, textinfo='label+percent')])
+    fig.update_layout(**COMPACT)
+    return fig
+
+
+def _fleet_bar(counts):
+    import plotly.express as px
+
+    fig = px.bar(x=counts.values, y=counts.index, orientation='h', labels={'x': 'Alerts', 'y': 'Fleet'})
+    fig.update_layout(**COMPACT)
+    return fig
+
+
+def _trend_area(trend):
+    import plotly.express as px
+
+    fig = px.area(trend, x='Date',
+                  y=['Active Alerts', 'Resolved Alerts'],
+                  labels={'value': 'Number of Alerts', 'variable': 'Alert Status'},
+                  color_discrete_map={'Active Alerts': '#EF553B', 'Resolved Alerts': '#00CC96'})
+    fig.update_layout(legend=dict(orientation="h", y=1.02, x=1), **COMPACT)
+    return fig
+
+
+def _resolution_bar(counts):
+    import plotly.express as px
+
+    fig = px.bar(x=counts.index, y=counts.values, labels={'x': 'Resolution Time', 'y': 'Number of Alerts'})
+    fig.update_layout(**COMPACT)
+    return fig
+
+
+def _top_bar(counts, label):
+    import plotly.express as px
+
+    return px.bar(counts, x=counts.values, y=counts.index, orientation='h', labels={'x': 'Count', 'index': label})
+
+
+def alert_type_donut(counts):
+    return cached_figure('alert_type_donut', counts, _donut)
+
+
+def fleet_bar(counts):
+    return cached_figure('fleet_bar', counts, _fleet_bar)
+
+
+def trend_area(trend):
+    return cached_figure('trend_area', trend, _trend_area)
+
+
+def resolution_bar(counts):
+    return cached_figure('resolution_bar', counts, _resolution_bar)
+
+
+def top_bar(counts, label):
+    return cached_figure('top_bar', counts, _top_bar, label)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from alert_schema import codes
+
+# Sidebar multiselects and the columns they filter
+FILTER_COLUMNS = ('Fleet', 'Alert Type', 'Vessel')
+
+
+def mark_sorted(df):
+    """Sort ``df`` by Date if needed and flag it so filters can binary-search it."""
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable', ignore_index=True)
+    df.attrs['sorted_by'] = 'Date'
+    return df
+
+
+def date_bounds(df, start_date, end_date):
+    """Row range ``lo:hi`` of ``start_date <= Date <= end_date``.
+
+    Frames flagged by :func:`mark_sorted` resolve it with two ``searchsorted``
+    calls; for anything else the whole frame is the candidate range.
+    """
+    if df.attrs.get('sorted_by') != 'Date':
+        return 0, len(df)
+    dates = df['Date'].to_numpy()
+    lo = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start_date)), side='left'))
+    hi = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end_date)), side='right'))
+    return lo, max(lo, hi)
+
+
+def select_rows(df, start_date, end_date, fleets=None, alert_types=None, vessels=None):
+    """Rows matching every sidebar predicate, as positions or a ``slice``.
+
+    On a date-sorted frame the period is a contiguous range found by binary
+    search, and only that range is scanned; if every row in it matches, the
+    range itself is returned without building a position array. The other
+    predicates are folded into one boolean mask in place, so no intermediate
+    frames are built. ``None`` leaves a dimension unfiltered. Categorical
+    columns are matched on their integer codes.
+    """
+    lo, hi = date_bounds(df, start_date, end_date)
+    if df.attrs.get('sorted_by') == 'Date':
+        mask = np.ones(hi - lo, dtype=bool)
+    else:
+        dates = df['Date'].to_numpy()
+        mask = dates >= np.datetime64(pd.Timestamp(start_date))
+        mask &= dates <= np.datetime64(pd.Timestamp(end_date))
+    for column, values in zip(FILTER_COLUMNS, (fleets, alert_types, vessels)):
+        if values is not None:
+            mask &= member_mask(df[column], values, lo, hi)
+    if mask.all():
+        return slice(lo, hi)
+    return lo + np.flatnonzero(mask)
+
+
+def member_mask(series, values, lo=0, hi=None):
+    """Boolean array of ``series.iloc[lo:hi].isin(values)``, via a code lookup table for categoricals."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.iloc[lo:hi].isin(values).to_numpy()
+    categories = series.cat.categories
+    wanted = categories.get_indexer(list(values))
+    # One spare slot at the end so missing values (code -1) look up False
+    lookup = np.zeros(len(categories) + 1, dtype=bool)
+    lookup[wanted[wanted >= 0]] = True
+    return lookup[codes(series)[lo:hi]]
+
+
+class Selection:
+    """Filtered view of an alert frame that materializes columns on demand.
+
+    Only the row positions (or a contiguous ``slice``) are kept; each column
+    is gathered the first time an aggregate asks for it, so widgets pay only
+    for the columns they use. A slice gathers without copying.
+    """
+
+    def __init__(self, df, rows):
+        self.source = df
+        self.rows = rows
+        self._columns = {}
+
+    def __len__(self):
+        if isinstance(self.rows, slice):
+            return self.rows.stop - self.rows.start
+        return len(self.rows)
+
+    def __getitem__(self, column):
+        series = self._columns.get(column)
+        if series is None:
+            if isinstance(self.rows, slice):
+                series = self.source[column].iloc[self.rows].reset_index(drop=True)
+            else:
+                series = self.source[column].take(self.rows).reset_index(drop=True)
+            self._columns[column] = series
+        return series
+
+    def frame(self, columns):
+        return pd.DataFrame({column: self[column] for column in columns})
+
+    def gather(self, values):
+        """The selected rows of an array aligned with the source frame."""
+        return values[self.rows] if isinstance(self.rows, slice) else values.take(self.rows)
+
+    def release(self):
+        """Drop materialized columns once the aggregates have been computed."""
+        self._columns.clear()
@@ -0,0 +1,349 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from alert_cache import LRUCache
+from alert_filters import Selection, date_bounds, select_rows
+from alert_schema import codes
+
+# Resolution Time Distribution buckets
+bins = [0, 0.25, 1, 3, 6, 12, np.inf]
+labels = ['0–15 min', '15–60 m', '1–3 hrs', '3–6 hrs', '6–12 hrs', '> 12 hrs']
+
+# Filtered views are small next to the dataset, but users revisit the same few
+VIEW_CACHE_SIZE = 64
+VIEW_CACHE_BYTES = int(float(os.environ.get("ALERT_VIEW_CACHE_MB", 256)) * 1e6)
+view_cache = LRUCache(maxsize=VIEW_CACHE_SIZE, max_bytes=VIEW_CACHE_BYTES)
+
+# Resolution bin codes (int8 for the usual few bins) of whole datasets, per set of bin edges
+_bin_codes_cache = LRUCache(maxsize=8)
+
+# Aggregation engine: "cube" (default), "pandas" or "duckdb"
+ENGINE = os.environ.get("ALERT_ENGINE", "cube")
+
+# Vessel/alert type pairs with at least this many alerts are kept in every view
+REPEAT_MIN_COUNT = 3
+REPEAT_SORT_COLUMNS = ('Count', 'Vessel', 'Alert Type')
+
+# Entries in the Top N panels
+TOP_K = int(os.environ.get("ALERT_TOP_K", 5))
+
+# Vessels With Alerts: "exact" (default) or "approx" from HyperLogLog sketches
+DISTINCT = os.environ.get("ALERT_DISTINCT", "exact")
+
+
+def view_key(df, start_date, end_date, fleets, alert_types, vessels):
+    """Canonical cache key for a sidebar selection over ``df``.
+
+    Selections are sets, so the order the user picked items in does not matter.
+    Live snapshots carry ``attrs['version']``, which changes as alerts arrive.
+    """
+    return (
+        df.attrs.get('dataset_id', id(df)), df.attrs.get('version', 0),
+        pd.Timestamp(start_date), pd.Timestamp(end_date),
+        tuple(sorted(fleets)), tuple(sorted(alert_types)),
+        None if vessels is None else tuple(sorted(vessels)),
+    )
+
+
+def vessel_options(df, start_date, end_date, fleets, alert_types, engine=None):
+    """Vessels left after the period, fleet and alert type filters."""
+    key = ('vessels',) + view_key(df, start_date, end_date, fleets, alert_types, None)
+    if (engine or ENGINE) == 'cube':
+        from alert_cube import cube_for
+        cube = cube_for(df)
+        return view_cache.get_or_compute(
+            key + (cube.version,), lambda: cube.vessel_options(start_date, end_date, fleets, alert_types))
+    return view_cache.get_or_compute(
+        key, lambda: sorted(present_categories(Selection(df, select_rows(df, start_date, end_date, fleets, alert_types))['Vessel'])))
+
+
+def code_counts(series):
+    """Occurrences of every category of a categorical column, by code."""
+    c = codes(series)
+    return np.bincount(c[c >= 0], minlength=len(series.cat.categories))
+
+
+def present_categories(series):
+    return list(series.cat.categories[code_counts(series) > 0])
+
+
+def top_order(counts, k=None):
+    """Positions of the ``k`` largest counts (all if ``None``), largest first, ties by position.
+
+    With ``k`` smaller than the number of counts only the top ``k`` are
+    sorted, after an ``argpartition`` on keys that make ties break by position.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    n = len(counts)
+    if k is None or k >= n:
+        return np.argsort(-counts, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    key = -counts * n + np.arange(n)
+    top = np.argpartition(key, k - 1)[:k]
+    return top[np.argsort(key[top])]
+
+
+def top_k(counts, k=TOP_K):
+    """The ``k`` largest entries of a counts Series, ties in index order, without sorting the rest.
+
+    ``k=None`` ranks every entry, like ``value_counts()``.
+    """
+    return counts.iloc[top_order(counts.to_numpy(), k)]
+
+
+def counts_series(counts, categories, name):
+    """Series of per-category counts in category order, unobserved categories dropped.
+
+    Not sorted by count: views keep the counts as they come, and whatever
+    shows a ranking picks it with :func:`top_k`.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    observed = np.flatnonzero(counts)
+    return pd.Series(counts[observed], index=pd.Index(categories[observed], name=name), name='count')
+
+
+def category_counts(series):
+    """Counts of a categorical's observed categories, in category order, from a ``bincount`` on its codes."""
+    return counts_series(code_counts(series), series.cat.categories, series.name)
+
+
+def pairs_frame(counts, left_categories, right_categories, names, min_count=1):
+    """Long frame of a 2-D count matrix, keeping cells of ``min_count`` or more."""
+    counts = np.asarray(counts, dtype=np.int64).ravel()
+    n_right = len(right_categories)
+    keep = np.flatnonzero(counts >= max(min_count, 1))
+    return pd.DataFrame({
+        names[0]: left_categories[keep // n_right],
+        names[1]: right_categories[keep % n_right],
+        'Count': counts[keep],
+    })
+
+
+def pair_counts(left, right, min_count=1):
+    """Group sizes of two categorical columns, keeping groups of ``min_count`` or more."""
+    n_left, n_right = len(left.cat.categories), len(right.cat.categories)
+    pair = codes(left).astype(np.int64) * n_right + codes(right)
+    counts = np.bincount(pair, minlength=n_left * n_right)
+    return pairs_frame(counts, left.cat.categories, right.cat.categories, (left.name, right.name), min_count)
+
+
+def resolution_bin_codes(values, edges=bins):
+    """Bin index of each resolution time, matching ``pd.cut(include_lowest=True)``.
+
+    Values below the first edge, above the last or NaN get -1. Codes are
+    int8 while the bins fit, wider for longer edge lists.
+    """
+    values = np.asarray(values)
+    bin_codes = np.searchsorted(np.asarray(edges, dtype=np.float64), values, side='left') - 1
+    bin_codes[values == edges[0]] = 0
+    bin_codes[(bin_codes < 0) | (bin_codes >= len(edges) - 1) | np.isnan(values)] = -1
+    return bin_codes.astype(code_dtype(len(edges) - 1))
+
+
+def code_dtype(n_bins):
+    """Smallest signed integer dtype holding bin codes ``-1..n_bins - 1``."""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_bins - 1 <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def resolution_codes(df, edges=bins):
+    """Bin code of every alert in ``df``, computed once per dataset version and ``edges``."""
+    key = (df.attrs.get('dataset_id', id(df)), df.attrs.get('version', 0), tuple(float(e) for e in edges))
+    return _bin_codes_cache.get_or_compute(
+        key, lambda: resolution_bin_codes(df['Resolution Time (hrs)'].to_numpy(), edges))
+
+
+def bin_counts(bin_codes, n_bins):
+    """Histogram of bin codes; -1 (outside the edges or NaN) is not counted."""
+    return np.bincount(bin_codes[bin_codes >= 0], minlength=n_bins).astype(np.int64)
+
+
+def edge_labels(edges):
+    """Bin labels for custom edges, e.g. ``0–0.5 hrs`` and ``> 12 hrs``."""
+    return [f"> {lo:g} hrs" if np.isinf(hi) else f"{lo:g}–{hi:g} hrs" for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+def res_time_series(counts):
+    """Resolution histogram Series shaped like ``pd.cut(...).value_counts().sort_index()``."""
+    index = pd.CategoricalIndex(labels, categories=labels, ordered=True, name='Resolution Time (hrs)')
+    return pd.Series(np.asarray(counts, dtype=np.int64), index=index, name='count')
+
+
+def alerts_time_frame(first_day, active, resolved):
+    """Dense per-day trend frame from consecutive daily counts starting at ``first_day``."""
+    active = np.asarray(active, dtype=np.int64)
+    resolved = np.asarray(resolved, dtype=np.int64)
+    dates = np.datetime64(first_day, 'D') + np.arange(len(active))
+    return pd.DataFrame({
+        'Date': dates.astype('datetime64[ns]'),
+        'Total Alerts': active + resolved,
+        'Active Alerts': active,
+        'Resolved Alerts': resolved,
+    })
+
+
+def daily_status_counts(dates, auto_cleared):
+    """Total, active and resolved alerts per day in a single scan.
+
+    Each row is bucketed to ``2 * day + auto_cleared`` and counted with one
+    ``bincount``; days without alerts between the first and last get zeros.
+    """
+    days = dates.to_numpy().astype('datetime64[D]')
+    if not len(days):
+        return alerts_time_frame(np.datetime64('1970-01-01'), [], [])
+    first = days.min()
+    n_days = int((days.max() - first).astype(np.int64)) + 1
+    bucket = (days - first).astype(np.int64) * 2 + auto_cleared.to_numpy()
+    counts = np.bincount(bucket, minlength=n_days * 2).reshape(n_days, 2)
+    return alerts_time_frame(first, counts[:, 0], counts[:, 1])
+
+
+def mean64(series):
+    """NaN-skipping mean accumulated in float64, NaN for an empty selection."""
+    values = series.to_numpy()
+    return float(np.nanmean(values, dtype=np.float64)) if len(values) else np.nan
+
+
+def compute_view(sel, counts=None):
+    """KPIs and chart aggregates for a filtered :class:`Selection`.
+
+    ``counts`` is an optional precomputed ``(total, active, resolved)``,
+    e.g. from a bitmap index.
+    """
+    view = {'rows': sel.rows}
+    auto_cleared = sel['Auto-Cleared']
+
+    # KPI values
+    if counts is None:
+        total = len(sel)
+        resolved = int(auto_cleared.sum())
+        counts = (total, total - resolved, resolved)
+    view['total_alerts'], view['active_alerts'], view['resolved_alerts'] = counts
+    view['vessels_with_alerts'] = int(np.count_nonzero(code_counts(sel['Vessel'])))
+    view['auto_cleared_percent'] = round(view['resolved_alerts'] / view['total_alerts'] * 100, 1) if view['total_alerts'] else np.nan
+    view['avg_resolution'] = round(mean64(sel['Resolution Time (hrs)']), 2)
+
+    # Alerts over time
+    view['alerts_time_df'] = daily_status_counts(sel['Date'], auto_cleared)
+
+    # Alert Type and Fleet Breakdown
+    view['alert_type_counts'] = category_counts(sel['Alert Type'])
+    view['fleet_alerts'] = category_counts(sel['Fleet'])
+    view['vessel_counts'] = category_counts(sel['Vessel'])
+
+    # Codes were binned once for the whole dataset; the histogram is one bincount of the selected ones
+    view['res_time_counts'] = res_time_series(bin_counts(sel.gather(resolution_codes(sel.source)), len(labels)))
+
+    view['repeat_alerts'] = pair_counts(sel['Vessel'], sel['Alert Type'], min_count=REPEAT_MIN_COUNT)
+
+    sel.release()
+    return view
+
+
+def dashboard_view(df, start_date, end_date, fleets, alert_types, vessels, engine=None, distinct=None):
+    """Every dashboard aggregate for a selection, memoized per selection.
+
+    With ``distinct="approx"`` and no vessel filter, ``vessels_with_alerts``
+    is estimated from the dataset's HyperLogLog sketch; a vessel filter
+    always gets the exact count, which sketches cannot restrict to.
+    """
+    distinct = distinct or DISTINCT
+    if distinct not in ('exact', 'approx'):
+        raise ValueError(f"Unknown distinct count mode: {distinct!r}")
+    view = _engine_view(df, start_date, end_date, fleets, alert_types, vessels, engine or ENGINE)
+    if distinct == 'approx' and vessels is None:
+        from alert_sketches import sketch_for
+        estimate = sketch_for(df).distinct(start_date, end_date, fleets, alert_types)
+        view = dict(view, vessels_with_alerts=estimate)
+    return view
+
+
+def _engine_view(df, start_date, end_date, fleets, alert_types, vessels, engine):
+    key = (engine,) + view_key(df, start_date, end_date, fleets, alert_types, vessels)
+    if engine == 'duckdb':
+        from alert_duckdb import compute_view_duckdb
+        return view_cache.get_or_compute(
+            key, lambda: compute_view_duckdb(df, start_date, end_date, fleets, alert_types, vessels))
+    if engine == 'cube':
+        from alert_cube import cube_for
+        cube = cube_for(df)
+        # Appends to the cube change its version, which retires views computed before them
+        return view_cache.get_or_compute(
+            key + (cube.version,), lambda: cube.query(start_date, end_date, fleets, alert_types, vessels))
+    if engine != 'pandas':
+        raise ValueError(f"Unknown aggregation engine: {engine!r}")
+    return view_cache.get_or_compute(key, lambda: _pandas_view(df, start_date, end_date, fleets, alert_types, vessels))
+
+
+def _selection(df, start_date, end_date, fleets, alert_types, vessels):
+    """Selected rows, and their ``(total, active, resolved)`` if a bitmap index counted them."""
+    if df.attrs.get('sorted_by') != 'Date':
+        return Selection(df, select_rows(df, start_date, end_date, fleets, alert_types, vessels)), None
+    from alert_bitmap import bitmap_for
+    index = bitmap_for(df)
+    lo, hi = date_bounds(df, start_date, end_date)
+    bits = index.select(fleets, alert_types, vessels, lo, hi)
+    return Selection(df, index.rows(bits)), index.counts(bits)
+
+
+def _pandas_view(df, start_date, end_date, fleets, alert_types, vessels):
+    sel, counts = _selection(df, start_date, end_date, fleets, alert_types, vessels)
+    return compute_view(sel, counts=counts)
+
+
+def repeat_alerts(df, start_date, end_date, fleets, alert_types, vessels, min_count=REPEAT_MIN_COUNT,
+                  sort_by='Count', ascending=False, engine=None):
+    """Vessel/alert type pairs with ``min_count`` or more alerts, sorted, memoized per selection.
+
+    Thresholds at or above ``REPEAT_MIN_COUNT`` filter the pairs the view
+    already holds; lower ones count the selected rows again. Ties keep the
+    vessel and alert type order, so pages stay stable between reruns.
+    """
+    if sort_by not in REPEAT_SORT_COLUMNS:
+        raise ValueError(f"sort_by must be one of {REPEAT_SORT_COLUMNS}")
+    min_count = max(int(min_count), 1)
+    key = ('repeat', min_count, sort_by, ascending) + view_key(df, start_date, end_date, fleets, alert_types, vessels)
+
+    def compute():
+        if min_count >= REPEAT_MIN_COUNT:
+            pairs = dashboard_view(df, start_date, end_date, fleets, alert_types, vessels, engine=engine)['repeat_alerts']
+            pairs = pairs[pairs['Count'] >= min_count]
+        else:
+            sel, _ = _selection(df, start_date, end_date, fleets, alert_types, vessels)
+            pairs = pair_counts(sel['Vessel'], sel['Alert Type'], min_count=min_count)
+        return pairs.sort_values(sort_by, ascending=ascending, kind='stable', ignore_index=True)
+
+    return view_cache.get_or_compute(key, compute)
+
+
+def page_of(frame, page, page_size):
+    """Rows of 1-based ``page``, clamped to the last page."""
+    n_pages = max(-(-len(frame) // page_size), 1)
+    page = min(max(int(page), 1), n_pages)
+    return frame.iloc[(page - 1) * page_size:page * page_size], page, n_pages
+
+
+def resolution_histogram(df, start_date, end_date, fleets, alert_types, vessels, edges=bins):
+    """Resolution Time Distribution of a selection over custom bin ``edges``.
+
+    The dataset is re-binned once per set of edges; each selection then
+    counts its rows' codes. Values outside the edges are left out.
+    """
+    edges = [float(e) for e in edges]
+    if len(edges) < 2 or np.any(np.diff(edges) <= 0):
+        raise ValueError("Bin edges must be at least two increasing numbers")
+    key = ('histogram', tuple(edges)) + view_key(df, start_date, end_date, fleets, alert_types, vessels)
+
+    def compute():
+        sel, _ = _selection(df, start_date, end_date, fleets, alert_types, vessels)
+        counts = bin_counts(sel.gather(resolution_codes(df, edges)), len(edges) - 1)
+        edge_names = edge_labels(edges)
+        index = pd.CategoricalIndex(edge_names, categories=edge_names, ordered=True, name='Resolution Time (hrs)')
+        return pd.Series(counts, index=index, name='count')
+
+    return view_cache.get_or_compute(key, compute)
@@ -0,0 +1,111 @@
+"""Optional per-stage timing and memory profile of a dashboard run.
+
+Each stage records wall-clock time, rows in and out and, while
+``tracemalloc`` is tracing, the peak memory allocated during the stage.
+Profiles are appended as one JSON line per run to ``ALERT_METRICS_FILE``.
+
+``tracemalloc`` traces the whole process, so with several sessions running
+at once peaks include their allocations too; it also slows allocation-heavy
+code down, which is why profiling is off unless asked for. Tracing runs
+while any profiled run is in progress and stops with the last one, also
+when a run is abandoned (a rerun or an exception) and its profiler is
+garbage collected.
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Profile every run without ticking the sidebar box
+PROFILE = os.environ.get("ALERT_PROFILE", "") not in ("", "0")
+METRICS_FILE = os.environ.get("ALERT_METRICS_FILE", "alert_timings.jsonl")
+
+# Profiled runs currently tracing, and whether they started tracemalloc (rather than someone else)
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_owns_tracing = False
+
+
+def _acquire_tracing():
+    global _tracing_runs, _owns_tracing
+    with _tracing_lock:
+        if not _tracing_runs and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        _tracing_runs += 1
+
+
+def _release_tracing():
+    global _tracing_runs, _owns_tracing
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if not _tracing_runs and _owns_tracing:
+            tracemalloc.stop()
+            _owns_tracing = False
+
+
+class RunProfiler:
+    """Stage records of one run; a no-op unless ``enabled``."""
+
+    def __init__(self, enabled=PROFILE, trace_memory=True):
+        self.enabled = enabled
+        self.stages = []
+        self._start = time.perf_counter()
+        self._end = None
+        self._release = None
+        if enabled and trace_memory:
+            _acquire_tracing()
+            # Runs cut short never reach finish(); collecting the profiler (or exiting) releases tracing
+            self._release = weakref.finalize(self, _release_tracing)
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        """Time the ``with`` block; set ``record['rows_out']`` inside it to report output rows."""
+        record = {'stage': name, 'rows_in': rows_in, 'rows_out': None}
+        if not self.enabled:
+            yield record
+            return
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            # Tracing stopped mid-stage (by code outside this module) leaves no usable peak
+            tracing = tracing and tracemalloc.is_tracing()
+            # Another session may reset the peak meanwhile, so it can come out below the base
+            record['peak_mb'] = max(tracemalloc.get_traced_memory()[1] - base, 0) / 1e6 if tracing else None
+            self.stages.append(record)
+
+    @property
+    def total_seconds(self):
+        return (self._end or time.perf_counter()) - self._start
+
+    def frame(self):
+        frame = pd.DataFrame(self.stages, columns=['stage', 'seconds', 'rows_in', 'rows_out', 'peak_mb'])
+        return frame.astype({'rows_in': 'Int64', 'rows_out': 'Int64'})
+
+    def close(self):
+        """Stop counting this run as tracing; tracing stops once no profiled run needs it."""
+        if self._release is not None:
+            self._release()
+
+    def finish(self, path=METRICS_FILE, **context):
+        """Release tracing and append the profile to ``path``."""
+        if not self.enabled:
+            return
+        self._end = time.perf_counter()
+        self.close()
+        if path:
+            entry = {'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+                     'total_seconds': self.total_seconds, 'stages': self.stages, **context}
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
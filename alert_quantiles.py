@@ -0,0 +1,203 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from alert_cache import LRUCache
+from alert_filters import Selection, select_rows
+from alert_schema import apply_schema, codes
+
+# Sketch cells; resolution times are what each cell summarizes
+DIMENSIONS = ('Fleet', 'Alert Type')
+
+# Quantiles come back within 2% of the true value
+RELATIVE_ACCURACY = 0.02
+# Times below this (including 0) share one bucket; above MAX_HRS they clamp to the last
+MIN_HRS = 0.01
+MAX_HRS = 10_000
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+_quantile_cache = LRUCache(maxsize=4)
+
+
+class ResolutionSketch:
+    """Log-bucketed resolution time histograms per (day, fleet, alert type).
+
+    A DDSketch-style mapping: bucket ``i`` covers ``(gamma**(i-1), gamma**i]``
+    hours, so any quantile read back from the bucket counts is within
+    ``RELATIVE_ACCURACY`` of the exact one. Buckets are plain counts, so
+    cells merge by addition for any day range and fleet/alert-type
+    combination, and rows can be removed again, e.g. as a live window moves.
+    """
+
+    def __init__(self, categories, accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.offset = int(np.floor(np.log(MIN_HRS) / np.log(self.gamma)))
+        self.n_buckets = int(np.ceil(np.log(MAX_HRS) / np.log(self.gamma))) - self.offset + 1
+        self.categories = {dim: pd.Index(categories[dim]) for dim in DIMENSIONS}
+        self.first_day = None
+        self.n_days = 0
+        self.version = 0
+        self._lock = threading.RLock()
+        self.counts = np.zeros((0,) + tuple(len(self.categories[dim]) for dim in DIMENSIONS) + (self.n_buckets,),
+                               dtype=np.int32)
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    @classmethod
+    def build(cls, df, accuracy=RELATIVE_ACCURACY):
+        sketch = cls({dim: df[dim].cat.categories for dim in DIMENSIONS}, accuracy)
+        sketch.append(df)
+        return sketch
+
+    def bucket(self, values):
+        """Bucket of each resolution time; bucket 0 holds everything below ``MIN_HRS``."""
+        values = np.asarray(values, dtype=np.float64)
+        with np.errstate(divide='ignore'):
+            index = np.ceil(np.log(np.maximum(values, MIN_HRS)) / np.log(self.gamma)) - self.offset
+        index[values < MIN_HRS] = 0
+        return np.clip(index, 0, self.n_buckets - 1).astype(np.int64)
+
+    def values(self):
+        """Representative value of each bucket, within the relative accuracy of anything in it."""
+        upper = self.gamma ** (np.arange(self.n_buckets) + self.offset)
+        values = 2 * upper / (1 + self.gamma)
+        values[0] = 0.0
+        return values
+
+    def _positions(self, dim, series):
+        mapping = self.categories[dim].get_indexer(series.cat.categories)
+        new = series.cat.categories[mapping < 0]
+        if len(new):
+            axis = DIMENSIONS.index(dim) + 1
+            shape = list(self.counts.shape)
+            shape[axis] = len(new)
+            self.counts = np.concatenate([self.counts, np.zeros(shape, self.counts.dtype)], axis=axis)
+            self.categories[dim] = self.categories[dim].append(new)
+            mapping = self.categories[dim].get_indexer(series.cat.categories)
+        return np.append(mapping, -1)[codes(series)]
+
+    def _ensure_days(self, first, last):
+        if self.first_day is None:
+            self.first_day = first
+        if first < self.first_day:
+            shift = int((self.first_day - first).astype(np.int64))
+            self.counts = np.concatenate([np.zeros((shift,) + self.counts.shape[1:], self.counts.dtype), self.counts])
+            self.first_day = first
+            self.n_days += shift
+        needed = int((last - self.first_day).astype(np.int64)) + 1
+        if needed > len(self.counts):
+            capacity = max(needed, 2 * len(self.counts))
+            pad = np.zeros((capacity - len(self.counts),) + self.counts.shape[1:], self.counts.dtype)
+            self.counts = np.concatenate([self.counts, pad])
+        self.n_days = max(self.n_days, needed)
+
+    def append(self, batch):
+        self._add(batch, 1)
+
+    def remove(self, batch):
+        """Subtract rows previously appended."""
+        self._add(batch, -1)
+
+    def _add(self, batch, sign):
+        batch = apply_schema(batch)
+        with self._lock:
+            positions = [self._positions(dim, batch[dim]) for dim in DIMENSIONS]
+            resolution = batch['Resolution Time (hrs)'].to_numpy()
+            valid = np.logical_and.reduce([p >= 0 for p in positions] + [~np.isnan(resolution)])
+            days = batch['Date'].to_numpy().astype('datetime64[D]')[valid]
+            if not len(days):
+                return
+            first, last = days.min(), days.max()
+            self._ensure_days(first, last)
+            lo = int((first - self.first_day).astype(np.int64))
+            hi = int((last - self.first_day).astype(np.int64)) + 1
+
+            cell = (days - first).astype(np.int64)
+            for dim, pos in zip(DIMENSIONS, positions):
+                cell = cell * len(self.categories[dim]) + pos[valid]
+            cell = cell * self.n_buckets + self.bucket(resolution[valid])
+            span = self.counts[lo:hi]
+            span += sign * np.bincount(cell, minlength=span.size).reshape(span.shape).astype(np.int32)
+            self.version += 1
+
+    def merged(self, start_date, end_date, fleets=None, alert_types=None, by=None):
+        """Bucket counts of a selection; per label of dimension ``by`` if given."""
+        start = np.datetime64(pd.Timestamp(start_date).ceil('D'), 'D')
+        end = np.datetime64(pd.Timestamp(end_date).floor('D'), 'D')
+        with self._lock:
+            if self.first_day is None:
+                lo = hi = 0
+            else:
+                lo = int(np.clip((start - self.first_day).astype(np.int64), 0, self.n_days))
+                hi = int(np.clip((end - self.first_day).astype(np.int64) + 1, lo, self.n_days))
+            counts = self.counts[lo:hi]
+            labels = {}
+            for axis, (dim, values) in enumerate(zip(DIMENSIONS, (fleets, alert_types)), start=1):
+                positions = np.arange(len(self.categories[dim]))
+                if values is not None:
+                    wanted = self.categories[dim].get_indexer(list(values))
+                    positions = np.unique(wanted[wanted >= 0])
+                counts = counts.take(positions, axis=axis)
+                labels[dim] = self.categories[dim][positions]
+        if by is None:
+            return counts.sum(axis=(0, 1, 2), dtype=np.int64)
+        keep = DIMENSIONS.index(by) + 1
+        axes = tuple(axis for axis in (0, 1, 2) if axis != keep)
+        return pd.DataFrame(counts.sum(axis=axes, dtype=np.int64), index=pd.Index(labels[by], name=by))
+
+    def quantiles(self, counts, qs=PERCENTILES):
+        """Quantiles ``qs`` from merged bucket counts; NaN when there are none."""
+        counts = np.asarray(counts, dtype=np.int64)
+        total = counts.sum()
+        if not total:
+            return np.full(len(qs), np.nan)
+        cumulative = np.cumsum(counts)
+        # Lower-rank convention, as in DDSketch: first bucket whose cumulative count exceeds q * (n - 1)
+        buckets = np.searchsorted(cumulative, np.asarray(qs) * (total - 1), side='right')
+        return self.values()[buckets]
+
+
+def quantiles_for(df):
+    """The resolution sketch of a loaded dataset, built once and shared by every session."""
+    return _quantile_cache.get_or_compute(df.attrs.get('dataset_id', id(df)), lambda: ResolutionSketch.build(df))
+
+
+def register_quantiles(dataset_id, sketch):
+    """Serve an externally maintained sketch (e.g. a live window's) for ``dataset_id``."""
+    _quantile_cache.put(dataset_id, sketch)
+
+
+def percentile_columns(qs=PERCENTILES):
+    return [f"p{round(q * 100):g}" for q in qs]
+
+
+def resolution_percentiles(df, start_date, end_date, fleets, alert_types, vessels, qs=PERCENTILES, by=None):
+    """Resolution time percentiles of a selection, overall or per fleet or alert type.
+
+    Served from the dataset's sketch without scanning rows; the sketch has
+    no vessel axis, so a vessel filter falls back to exact quantiles of the
+    selected rows. Returns a Series indexed like ``p50``, or a frame with one
+    row per ``by`` label.
+    """
+    columns = percentile_columns(qs)
+    if vessels is None:
+        sketch = quantiles_for(df)
+        counts = sketch.merged(start_date, end_date, fleets, alert_types, by=by)
+        if by is None:
+            return pd.Series(sketch.quantiles(counts, qs), index=columns)
+        rows = [sketch.quantiles(row, qs) for row in counts.to_numpy()]
+        return pd.DataFrame(rows, index=counts.index, columns=columns).dropna(how='all')
+    sel = Selection(df, select_rows(df, start_date, end_date, fleets, alert_types, vessels))
+    frame = pd.DataFrame({'res': sel['Resolution Time (hrs)'].astype(np.float64)})
+    if by is None:
+        values = frame['res'].dropna().to_numpy()
+        return pd.Series(np.quantile(values, qs) if len(values) else np.full(len(qs), np.nan), index=columns)
+    frame[by] = sel[by]
+    # An empty selection unstacks to no columns at all
+    grouped = frame.groupby(by, observed=True)['res'].quantile(list(qs)).unstack().reindex(columns=list(qs))
+    grouped.columns = columns
+    return grouped
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+# Reference data for the alert feed
+vessels = [f"Vessel_{i}" for i in range(1, 21)]
+fleets = ['Fleet A', 'Fleet B', 'Fleet C', 'Fleet D']
+alert_types = ['Speeding', 'Late Report', 'Excess Slip', 'Bilge ROB', 'Sludge ROB', 'AE Usage', 'Shaft Generator Usage']
+
+# Fixed category lists; labels outside them are appended when a frame is typed
+CATEGORIES = {
+    'Fleet': fleets,
+    'Vessel': vessels,
+    'Alert Type': alert_types,
+}
+
+DTYPES = {
+    'Date': 'datetime64[ns]',
+    'Resolution Time (hrs)': np.float32,
+    'Auto-Cleared': bool,
+}
+
+COLUMNS = ['Date', 'Fleet', 'Vessel', 'Alert Type', 'Resolution Time (hrs)', 'Auto-Cleared']
+
+DAY_NS = 86_400 * 10**9
+
+
+def categorical(values, column):
+    """``values`` as a Categorical over the fixed categories for ``column``."""
+    known = CATEGORIES[column]
+    if isinstance(values, pd.Series) and isinstance(values.dtype, pd.CategoricalDtype):
+        present = values.cat.categories
+    else:
+        present = pd.unique(np.asarray(values, dtype=object))
+    extra = sorted(v for v in set(present) - set(known) if not pd.isna(v))
+    return pd.Categorical(values, categories=list(known) + extra)
+
+
+def has_fixed_categories(series, column):
+    known = CATEGORIES[column]
+    dtype = series.dtype
+    return isinstance(dtype, pd.CategoricalDtype) and list(dtype.categories[:len(known)]) == list(known)
+
+
+def day_dates(series):
+    """``series`` floored to midnight, or as is if it already is."""
+    if not np.any(series.to_numpy().view(np.int64) % DAY_NS):
+        return series
+    return series.dt.floor('D')
+
+
+def apply_schema(df):
+    """Return ``df`` with compact dtypes: categoricals, float32 and bool.
+
+    Alerts are bucketed by day, so any time of day is dropped from ``Date``:
+    the cube and sketches only have a day axis, and every engine must agree
+    on which alerts a period holds. Columns that already carry the target
+    dtype are reused as is, so typing a frame the generator produced is
+    cheap. Columns missing from ``df`` (a pruned read) are skipped.
+    """
+    columns = {}
+    for column in COLUMNS:
+        if column not in df:
+            continue
+        series = df[column]
+        if column in CATEGORIES:
+            if not has_fixed_categories(series, column):
+                series = pd.Series(categorical(series, column), index=df.index)
+        elif series.dtype != DTYPES[column]:
+            series = series.astype(DTYPES[column])
+        if column == 'Date':
+            series = day_dates(series)
+        columns[column] = series
+    typed = pd.DataFrame(columns)
+    typed.attrs.update(df.attrs)
+    return typed
+
+
+def codes(series):
+    """Integer category codes of a categorical column (-1 for missing)."""
+    return series.cat.codes.to_numpy()
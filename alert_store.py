@@ -0,0 +1,98 @@
+"""Date-partitioned Parquet storage for alert history (requires pyarrow).
+
+Alerts are written as a Hive-partitioned dataset, one directory per day
+(``Date=2025-01-01/``). Reads prune partitions on the date range, push the
+multiselect filters down to row-group statistics and only read the
+requested columns.
+"""
+import os
+
+import pandas as pd
+
+from alert_schema import COLUMNS, apply_schema
+
+# Within a day, rows are clustered so row-group statistics can skip fleets and types
+SORT_COLUMNS = ['Fleet', 'Alert Type', 'Vessel']
+ROW_GROUP_SIZE = 64 * 1024
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+    except ImportError as e:
+        raise ImportError("The Parquet alert store needs pyarrow: pip install pyarrow") from e
+    return pa, ds
+
+
+def _partitioning():
+    pa, ds = _pyarrow()
+    return ds.partitioning(pa.schema([('Date', pa.date32())]), flavor='hive')
+
+
+def write_alerts(df, root, append=False):
+    """Write ``df`` under ``root``, replacing the days it contains.
+
+    Days not present in ``df`` are left untouched, so a daily batch can be
+    written with ``append=True`` without rewriting history.
+    """
+    pa, ds = _pyarrow()
+    df = apply_schema(df).sort_values(['Date'] + SORT_COLUMNS, kind='stable')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.set_column(table.schema.get_field_index('Date'), 'Date', table['Date'].cast(pa.date32()))
+    ds.write_dataset(
+        table, root, format='parquet', partitioning=_partitioning(),
+        existing_data_behavior='delete_matching' if append else 'overwrite_or_ignore',
+        max_rows_per_group=ROW_GROUP_SIZE, min_rows_per_group=min(ROW_GROUP_SIZE, 1024),
+        basename_template='part-{i}.parquet',
+    )
+
+
+def _day_scalar(value, round_up):
+    pa, _ = _pyarrow()
+    ts = pd.Timestamp(value)
+    ts = ts.ceil('D') if round_up else ts.floor('D')
+    return pa.scalar(ts.date(), pa.date32())
+
+
+def alert_filter(start_date=None, end_date=None, fleets=None, alert_types=None, vessels=None):
+    """pyarrow dataset expression for the sidebar selection, or ``None``."""
+    _, ds = _pyarrow()
+    predicates = []
+    if start_date is not None:
+        predicates.append(ds.field('Date') >= _day_scalar(start_date, round_up=True))
+    if end_date is not None:
+        predicates.append(ds.field('Date') <= _day_scalar(end_date, round_up=False))
+    for column, values in (('Fleet', fleets), ('Alert Type', alert_types), ('Vessel', vessels)):
+        if values is not None:
+            predicates.append(ds.field(column).isin(list(values)))
+    expr = None
+    for predicate in predicates:
+        expr = predicate if expr is None else expr & predicate
+    return expr
+
+
+def read_alerts(root, start_date=None, end_date=None, fleets=None, alert_types=None, vessels=None, columns=None):
+    """Read the matching alerts from ``root`` as a schema-typed frame."""
+    _, ds = _pyarrow()
+    dataset = ds.dataset(root, format='parquet', partitioning=_partitioning())
+    columns = list(columns or COLUMNS)
+    table = dataset.to_table(
+        columns=columns,
+        filter=alert_filter(start_date, end_date, fleets, alert_types, vessels),
+    )
+    df = table.to_pandas()
+    if 'Date' in df:
+        df['Date'] = pd.to_datetime(df['Date'])
+    df = apply_schema(df)
+    if 'Date' in df and not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable', ignore_index=True)
+    return df
+
+
+def latest_date(root):
+    """Most recent day in the store, read from the partition directories."""
+    days = [name.split('=', 1)[1] for name in os.listdir(root) if name.startswith('Date=')]
+    if not days:
+        raise ValueError(f"No alert partitions under {root}")
+    return pd.Timestamp(max(days))
@@ -0,0 +1,354 @@
+"""Live alert ingest into a rolling in-memory window.
+
+``ALERT_SOURCE=live:<file.ndjson>`` makes the dashboard follow an NDJSON file
+of alerts (one JSON object per line, keyed by the dashboard column names;
+any time of day in ``Date`` is dropped, as alerts are bucketed by day).
+New lines land in a fixed-size columnar ring buffer and in an incrementally
+maintained cube, so reruns pick up new alerts without a reload. The window
+keeps ``ALERT_RETENTION_DAYS`` days behind the latest alert, by default
+enough for Year to Date and Last 30 Days, whichever reaches back further.
+Custom ranges further back need a longer retention.
+
+Replay synthetic alerts into a file for testing with::
+
+    python alert_stream.py replay alerts.ndjson --rate 200
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from alert_bitmap import BitmapIndex, register_bitmap
+from alert_cube import AlertCube, register_cube
+from alert_filters import mark_sorted
+from alert_quantiles import ResolutionSketch, register_quantiles
+from alert_sketches import DistinctSketch, register_sketch
+from alert_schema import CATEGORIES, COLUMNS, apply_schema, codes
+
+WINDOW_ROWS = int(os.environ.get("ALERT_WINDOW_ROWS", 5_000_000))
+RETENTION_DAYS = int(os.environ["ALERT_RETENTION_DAYS"]) if os.environ.get("ALERT_RETENTION_DAYS") else None
+POLL_INTERVAL = 0.5
+BATCH_ROWS = 10_000
+
+# JSON values accepted for Auto-Cleared (0 and 1 match False and True); anything else (including a missing value) rejects the record
+AUTO_CLEARED = {True: True, False: False, 'true': True, 'false': False}
+
+log = logging.getLogger(__name__)
+_live_ids = itertools.count(1)
+
+
+def records_frame(records):
+    """Schema-typed frame from a list of alert dicts.
+
+    Records that are not objects or lack a parseable Date or a boolean
+    Auto-Cleared are logged and dropped; the rest of the batch is kept.
+    """
+    objects = [record for record in records if isinstance(record, dict)]
+    df = pd.DataFrame.from_records(objects, columns=COLUMNS)
+    # Offsets (e.g. a trailing Z) are converted to UTC; dates without one are taken as UTC already
+    try:
+        dates = pd.to_datetime(df['Date'], utc=True)
+    except (TypeError, ValueError):
+        dates = pd.to_datetime(df['Date'], format='mixed', errors='coerce', utc=True)
+    df['Date'] = dates.dt.tz_localize(None)
+    df['Auto-Cleared'] = df['Auto-Cleared'].map(lambda value: AUTO_CLEARED.get(value) if isinstance(value, (bool, int, float, str)) else None)
+    df['Resolution Time (hrs)'] = pd.to_numeric(df['Resolution Time (hrs)'], errors='coerce')
+    valid = df['Date'].notna() & df['Auto-Cleared'].notna()
+    if len(objects) < len(records) or not valid.all():
+        log.warning("Skipped %d malformed alert records", len(records) - int(valid.sum()))
+        df = df[valid]
+    df['Auto-Cleared'] = df['Auto-Cleared'].astype(bool)
+    return apply_schema(df)
+
+
+def parse_lines(lines):
+    """Records of the non-empty NDJSON ``lines``; lines that are not valid JSON are logged and skipped."""
+    records = []
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            log.warning("Skipped malformed NDJSON line: %.200s", line)
+    return records
+
+
+def retention_cutoff(latest, days=None):
+    """Oldest date a window ending at ``latest`` keeps.
+
+    ``days`` behind ``latest`` if given, otherwise the start of the longer of
+    Year to Date and Last 30 Days (the latter reaches into last year in January).
+    """
+    if days is not None:
+        return latest - pd.Timedelta(days=days)
+    return min(pd.Timestamp(latest.year, 1, 1), latest - pd.Timedelta(days=30))
+
+
+def tail_ndjson(path, poll_interval=POLL_INTERVAL, stop=None):
+    """Yield lists of records appended to ``path``, following it like ``tail -f``.
+
+    Waits for the file to appear, keeps a partial last line until it is
+    completed and starts over if the file is truncated.
+    """
+    while not os.path.exists(path):
+        if _wait(stop, poll_interval):
+            return
+    with open(path, encoding='utf-8') as f:
+        pending = ''
+        while stop is None or not stop.is_set():
+            chunk = f.read()
+            if chunk:
+                lines = (pending + chunk).split('\n')
+                pending = lines.pop()
+                records = parse_lines(lines)
+                if records:
+                    yield records
+                continue
+            if os.stat(path).st_size < f.tell():
+                f.seek(0)
+                pending = ''
+                continue
+            _wait(stop, poll_interval)
+
+
+def _wait(stop, seconds):
+    """Sleep for ``seconds``; True if ``stop`` was set meanwhile."""
+    if stop is None:
+        time.sleep(seconds)
+        return False
+    return stop.wait(seconds)
+
+
+def drain_queue(source, max_batch=BATCH_ROWS, timeout=POLL_INTERVAL, stop=None):
+    """Yield batches of records put on a ``queue.Queue``; a local stand-in for a broker."""
+    while stop is None or not stop.is_set():
+        try:
+            records = [source.get(timeout=timeout)]
+        except queue.Empty:
+            continue
+        while len(records) < max_batch:
+            try:
+                records.append(source.get_nowait())
+            except queue.Empty:
+                break
+        yield records
+
+
+class AlertWindow:
+    """Fixed-capacity columnar ring buffer of the most recent alerts.
+
+    Categorical columns are stored as codes against categories that grow as
+    new labels arrive. Rows are kept in arrival order.
+    """
+
+    def __init__(self, capacity=WINDOW_ROWS):
+        self.capacity = capacity
+        self.start = 0
+        self.size = 0
+        self.dates = np.empty(capacity, dtype='datetime64[ns]')
+        self.categories = {dim: pd.Index(CATEGORIES[dim]) for dim in CATEGORIES}
+        self.codes = {dim: np.empty(capacity, dtype=np.int32) for dim in CATEGORIES}
+        self.resolution = np.empty(capacity, dtype=np.float32)
+        self.auto_cleared = np.empty(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.size
+
+    def _positions(self, lo=0, hi=None):
+        hi = self.size if hi is None else hi
+        return (self.start + np.arange(lo, hi)) % self.capacity
+
+    def _codes(self, dim, series):
+        mapping = self.categories[dim].get_indexer(series.cat.categories)
+        new = series.cat.categories[mapping < 0]
+        if len(new):
+            self.categories[dim] = self.categories[dim].append(new)
+            mapping = self.categories[dim].get_indexer(series.cat.categories)
+        return np.append(mapping, -1)[codes(series)]
+
+    def frame(self, lo=0, hi=None):
+        """Rows ``lo:hi`` (oldest first) as a schema-typed frame."""
+        pos = self._positions(lo, hi)
+        return pd.DataFrame({
+            'Date': self.dates[pos],
+            'Fleet': pd.Categorical.from_codes(self.codes['Fleet'][pos], self.categories['Fleet']),
+            'Vessel': pd.Categorical.from_codes(self.codes['Vessel'][pos], self.categories['Vessel']),
+            'Alert Type': pd.Categorical.from_codes(self.codes['Alert Type'][pos], self.categories['Alert Type']),
+            'Resolution Time (hrs)': self.resolution[pos],
+            'Auto-Cleared': self.auto_cleared[pos],
+        })
+
+    def _drop_oldest(self, n):
+        evicted = self.frame(0, n)
+        self.start = (self.start + n) % self.capacity
+        self.size -= n
+        return evicted
+
+    def extend(self, batch):
+        """Append ``batch``; return ``(kept, evicted)`` frames.
+
+        ``kept`` is the part of the batch that fit (all of it unless the batch
+        alone exceeds the capacity) and ``evicted`` the oldest rows pushed out.
+        """
+        batch = apply_schema(batch).iloc[-self.capacity:]
+        n = len(batch)
+        overflow = max(self.size + n - self.capacity, 0)
+        evicted = self._drop_oldest(overflow) if overflow else None
+        pos = (self.start + self.size + np.arange(n)) % self.capacity
+        self.dates[pos] = batch['Date'].to_numpy()
+        for dim in CATEGORIES:
+            self.codes[dim][pos] = self._codes(dim, batch[dim])
+        self.resolution[pos] = batch['Resolution Time (hrs)'].to_numpy()
+        self.auto_cleared[pos] = batch['Auto-Cleared'].to_numpy()
+        self.size += n
+        return batch, evicted
+
+    def evict_before(self, cutoff):
+        """Drop leading rows dated before ``cutoff``; return them, or ``None``."""
+        current = self.dates[self._positions()] >= np.datetime64(cutoff)
+        n = int(np.argmax(current)) if current.any() else self.size
+        return self._drop_oldest(n) if n else None
+
+    def _date_extreme(self, reduce):
+        # The rows are at most two contiguous runs of the buffer; reduce them in place
+        if not self.size:
+            return None
+        end = self.start + self.size
+        if end <= self.capacity:
+            return reduce(self.dates[self.start:end])
+        return reduce(np.array([reduce(self.dates[self.start:]), reduce(self.dates[:end - self.capacity])]))
+
+    def latest(self):
+        return self._date_extreme(np.max)
+
+    def earliest(self):
+        return self._date_extreme(np.min)
+
+
+class LiveAlerts:
+    """A rolling alert window plus its cube, bitmaps and sketches, fed from a record source.
+
+    ``snapshot()`` returns the window as a frame that the rest of the
+    dashboard treats like any loaded dataset. It is rebuilt only when new
+    alerts have arrived since the last call.
+    """
+
+    def __init__(self, capacity=WINDOW_ROWS, retention_days=RETENTION_DAYS):
+        self.window = AlertWindow(capacity)
+        self.retention_days = retention_days
+        self.cube = AlertCube(CATEGORIES)
+        self.bitmaps = BitmapIndex()
+        self.quantiles = ResolutionSketch(CATEGORIES)
+        self.distinct = DistinctSketch(CATEGORIES)
+        self.dataset_id = f"live-{next(_live_ids)}"
+        self.version = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def ingest(self, records):
+        batch = records if isinstance(records, pd.DataFrame) else records_frame(records)
+        if not len(batch):
+            return
+        with self._lock:
+            kept, evicted = self.window.extend(batch)
+            self.cube.append(kept)
+            self.quantiles.append(kept)
+            if evicted is not None:
+                self.cube.remove(evicted)
+                self.quantiles.remove(evicted)
+                self.bitmaps.drop_front(len(evicted))
+            self.bitmaps.append(kept)
+            self.distinct.update(kept)
+            latest = pd.Timestamp(self.window.latest())
+            aged = self.window.evict_before(retention_cutoff(latest, self.retention_days))
+            if aged is not None:
+                self.cube.remove(aged)
+                self.quantiles.remove(aged)
+                self.bitmaps.drop_front(len(aged))
+            # HLL registers cannot drop rows; days with no rows left in the window are emptied whole
+            if evicted is not None or aged is not None:
+                self.distinct.clear_before(self.window.earliest())
+            self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            if self._snapshot is None or self._snapshot.attrs['version'] != self.version:
+                df = self.window.frame()
+                in_order = df['Date'].is_monotonic_increasing
+                df = mark_sorted(df)
+                df.attrs.update(dataset_id=self.dataset_id, version=self.version)
+                self._snapshot = df
+                # The window's bitmaps follow arrival order, which matches the snapshot unless it was re-sorted
+                if in_order:
+                    register_bitmap(self.dataset_id, self.version, self.bitmaps.copy())
+            register_cube(self.dataset_id, self.cube)
+            register_quantiles(self.dataset_id, self.quantiles)
+            register_sketch(self.dataset_id, self.distinct)
+            return self._snapshot
+
+    def start(self, source):
+        """Ingest batches from the iterable ``source`` on a daemon thread."""
+        def run():
+            for records in source:
+                if not records:
+                    continue
+                # A batch that cannot be ingested is lost, but the window keeps following the source
+                try:
+                    self.ingest(records)
+                except Exception:
+                    log.exception("Failed to ingest %d live alert records", len(records))
+
+        self._thread = threading.Thread(target=run, name=f"{self.dataset_id}-ingest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+
+_live = {}
+_live_lock = threading.Lock()
+
+
+def live_alerts(path):
+    """The process-wide live window following ``path``, started on first use."""
+    with _live_lock:
+        live = _live.get(path)
+        if live is None:
+            live = _live[path] = LiveAlerts()
+            live.start(tail_ndjson(path, stop=live._stop))
+        return live
+
+
+def replay(path, rate, seed=0):
+    """Append synthetic alerts to ``path`` at ``rate`` per second, one day per second."""
+    from alert_data import generate_alerts
+
+    day = pd.Timestamp.now().normalize()
+    for i in itertools.count():
+        df = generate_alerts(n_rows=rate, seed=seed + i, days=1, base_date=day + pd.Timedelta(days=i))
+        df['Date'] = df['Date'].dt.strftime('%Y-%m-%d')
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(df.astype({'Fleet': str, 'Vessel': str, 'Alert Type': str})
+                    .to_json(orient='records', lines=True))
+        time.sleep(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Live alert tools")
+    sub = parser.add_subparsers(dest='command', required=True)
+    replay_parser = sub.add_parser('replay', help="append synthetic alerts to an NDJSON file")
+    replay_parser.add_argument('path')
+    replay_parser.add_argument('--rate', type=int, default=100, help="alerts per second")
+    args = parser.parse_args()
+    replay(args.path, args.rate)
@@ -0,0 +1,43 @@
+"""Compare the vectorized alert generator with the original per-row loop.
+
+Usage: python benchmarks/bench_generate.py [--rows 10000 100000 ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alert_data import generate_alerts, generate_alerts_loop  # noqa: E402
+
+# The loop gets too slow to be worth timing past this size
+LOOP_MAX_ROWS = 200_000
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    df = fn(*args, **kwargs)
+    return time.perf_counter() - start, df
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000, 10_000_000])
+    args = parser.parse_args(argv)
+
+    print(f"{'rows':>12} {'loop s':>10} {'vector s':>10} {'speedup':>9} {'MB':>8}")
+    for rows in args.rows:
+        vec_s, df = timed(generate_alerts, n_rows=rows)
+        mb = df.memory_usage(deep=True).sum() / 1e6
+        if rows <= LOOP_MAX_ROWS:
+            # ~9.5 alerts a day on average, so scale the day count to hit the target size
+            loop_s, loop_df = timed(generate_alerts_loop, days=max(1, round(rows / 9.5)))
+            loop_s *= rows / len(loop_df)
+            print(f"{rows:>12,} {loop_s:>10.3f} {vec_s:>10.3f} {loop_s / vec_s:>8.0f}x {mb:>8.1f}")
+        else:
+            print(f"{rows:>12,} {'-':>10} {vec_s:>10.3f} {'-':>9} {mb:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
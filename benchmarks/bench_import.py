@@ -0,0 +1,106 @@
+"""Import-time report of the dashboard's startup imports (``python -X importtime``).
+
+Usage: python benchmarks/bench_import.py [--top 15] [--output results.json]
+                                         [--compare baseline.json]
+
+Runs the module-level imports of ``alert_dashboard.py`` in a fresh
+interpreter, several times, and reports the cumulative import time of each
+top-level package from the fastest run. ``plotly.express`` should not be
+among them: charts import it on first use (Streamlit itself loads the
+lighter ``plotly.graph_objects``). The run exits non-zero when a module
+listed in ``--forbid`` is imported at startup or, with ``--compare``, when
+the total got slower than ``--threshold``.
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DASHBOARD = os.path.join(ROOT, 'alert_dashboard.py')
+
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def startup_imports(path=DASHBOARD):
+    """Source of the module-level import statements of ``path``."""
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return '\n'.join(ast.get_source_segment(source, node) for node in tree.body
+                     if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def importtime(code):
+    """``({package: (self_us, cumulative_us)}, modules)`` for what ``code`` imports.
+
+    Times are per outermost import; ``modules`` lists every module loaded,
+    nested ones included.
+    """
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    packages, modules = {}, set()
+    for line in proc.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules.add(match.group(4))
+        # Nested imports are indented; times come from the outermost ones
+        if match and len(match.group(3)) == 1:
+            self_us, cumulative_us, module = int(match.group(1)), int(match.group(2)), match.group(4)
+            top = module.split('.')[0]
+            prev = packages.get(top, (0, 0))
+            packages[top] = (prev[0] + self_us, prev[1] + cumulative_us)
+    return packages, modules
+
+
+def run(repeat):
+    code = startup_imports()
+    runs = [importtime(code) for _ in range(repeat)]
+    best, modules = min(runs, key=lambda r: sum(c for _, c in r[0].values()))
+    return {
+        'total_ms': sum(c for _, c in best.values()) / 1e3,
+        'packages': {name: cumulative / 1e3 for name, (_, cumulative) in
+                     sorted(best.items(), key=lambda item: -item[1][1])},
+        'modules': sorted(modules),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file from an earlier run")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio that counts as a regression")
+    parser.add_argument('--forbid', nargs='*', default=['plotly.express'], help="modules that must not load at startup")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat)
+    print(f"{'package':<24} {'ms':>9}")
+    for name, ms in list(results['packages'].items())[:args.top]:
+        print(f"{name:<24} {ms:>9.1f}")
+    print(f"{'total':<24} {results['total_ms']:>9.1f}")
+
+    failed = False
+    for name in args.forbid:
+        if any(m == name or m.startswith(name + '.') for m in results['modules']):
+            print(f"{name} is imported at startup")
+            failed = True
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        ratio = results['total_ms'] / baseline['total_ms']
+        print(f"total vs baseline: {ratio:.2f}x")
+        failed |= ratio > args.threshold
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Time each stage of the dashboard data path on synthetic alert frames.
+
+Usage: python benchmarks/bench_pipeline.py [--rows 10000 100000 ...] [--output results.json]
+                                           [--compare baseline.json]
+
+Each stage is timed on its own, on the same frame and selection the
+dashboard would use: a 30-day period, two of the four fleets and all but
+two alert types. Results are written as JSON together with the commit they
+were measured on; ``--compare`` prints the ratio to an earlier run and
+exits non-zero when a stage got slower than ``--threshold``. Sizes up to
+10^8 rows work but need a few GB of memory.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from alert_data import alert_types, fleets, generate_alerts  # noqa: E402
+from alert_filters import Selection, date_bounds, mark_sorted, select_rows  # noqa: E402
+from alert_metrics import (  # noqa: E402
+    bin_counts, bins, category_counts, code_counts, daily_status_counts, dashboard_view, labels, mean64, pair_counts,
+    resolution_codes, view_cache,
+)
+
+# Generation is timed once; everything else is cheap enough to repeat
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+def selection(df):
+    end = df['Date'].iloc[-1]
+    return dict(start_date=end - pd.Timedelta(days=30), end_date=end,
+                fleets=fleets[:2], alert_types=alert_types[:-2], vessels=None)
+
+
+def stages(df, sel):
+    """``(name, callable)`` for every stage, each over its own inputs only."""
+    selected = Selection(df, select_rows(df, **sel))
+    filtered = selected.frame(df.columns)
+    res_codes = resolution_codes(df)
+
+    def kpis():
+        total = len(filtered)
+        resolved = int(filtered['Auto-Cleared'].sum())
+        return (total, total - resolved, int(np.count_nonzero(code_counts(filtered['Vessel']))),
+                resolved / total if total else np.nan, mean64(filtered['Resolution Time (hrs)']))
+
+    def value_counts():
+        return [category_counts(filtered[column]) for column in ('Alert Type', 'Fleet', 'Vessel')]
+
+    def res_histogram():
+        res_bin = pd.cut(filtered['Resolution Time (hrs)'], bins=bins, labels=labels, include_lowest=True)
+        return res_bin.value_counts().sort_index()
+
+    def view(engine):
+        def run():
+            view_cache.invalidate()
+            return dashboard_view(df, engine=engine, **sel)
+        return run
+
+    return [
+        ('period_filter', lambda: date_bounds(df, sel['start_date'], sel['end_date'])),
+        ('categorical_filter', lambda: select_rows(df, **sel)),
+        ('kpis', kpis),
+        ('alerts_time_df', lambda: daily_status_counts(filtered['Date'], filtered['Auto-Cleared'])),
+        ('value_counts', value_counts),
+        ('res_histogram', res_histogram),
+        ('res_histogram_codes', lambda: bin_counts(selected.gather(res_codes), len(labels))),
+        ('repeat_alerts', lambda: pair_counts(filtered['Vessel'], filtered['Alert Type'], min_count=3)),
+        ('view_pandas', view('pandas')),
+        ('view_cube', view('cube')),
+    ]
+
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': pd.Timestamp.now(tz='UTC').isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(rows_list, repeat):
+    results = {'environment': environment(), 'sizes': {}}
+    for rows in rows_list:
+        start = time.perf_counter()
+        df = mark_sorted(generate_alerts(n_rows=rows))
+        elapsed = time.perf_counter() - start
+        sizes = results['sizes'][str(rows)] = {'generate': {'min': elapsed, 'median': elapsed, 'repeat': 1}}
+        sel = selection(df)
+        for name, fn in stages(df, sel):
+            sizes[name] = timed(fn, repeat)
+        print(f"{rows:>12,} " + " ".join(f"{name}={t['min'] * 1e3:.2f}ms" for name, t in sizes.items()), flush=True)
+        del df
+    return results
+
+
+def compare(results, baseline, threshold, min_ms):
+    """Print current/baseline ratios; True if any stage regressed past ``threshold``.
+
+    Stages faster than ``min_ms`` in the baseline are shown but never flagged,
+    since timer noise dominates at that scale.
+    """
+    regressed = False
+    print(f"\nCompared with {baseline['environment'].get('commit')}:")
+    print(f"{'rows':>12} {'stage':<20} {'ratio':>7}")
+    for rows, sizes in results['sizes'].items():
+        for name, t in sizes.items():
+            old = baseline['sizes'].get(rows, {}).get(name)
+            if not old:
+                continue
+            ratio = t['min'] / old['min']
+            flag = ' REGRESSION' if ratio > threshold and old['min'] * 1e3 >= min_ms else ''
+            regressed |= bool(flag)
+            print(f"{int(rows):>12,} {name:<20} {ratio:>6.2f}x{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="baseline JSON file from an earlier run")
+    parser.add_argument('--threshold', type=float, default=1.2, help="slowdown ratio that counts as a regression")
+    parser.add_argument('--min-ms', type=float, default=1.0, help="ignore regressions in stages faster than this")
+    args = parser.parse_args(argv)
+
+    results = run(args.rows, args.repeat)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, args.min_ms):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
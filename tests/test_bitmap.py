@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from alert_bitmap import SPARSE_LABELS, BitmapIndex
+from alert_filters import date_bounds, mark_sorted, select_rows
+from alert_schema import alert_types, apply_schema, fleets
+
+
+def alert_frame(n_rows, n_vessels, seed=0):
+    rng = np.random.default_rng(seed)
+    return mark_sorted(apply_schema(pd.DataFrame({
+        'Date': pd.Timestamp('2025-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 60, n_rows)), unit='D'),
+        'Fleet': rng.choice(fleets, n_rows),
+        'Vessel': np.char.add('Hull_', rng.integers(0, n_vessels, n_rows).astype(str)),
+        'Alert Type': rng.choice(alert_types, n_rows),
+        'Resolution Time (hrs)': rng.exponential(2, n_rows),
+        'Auto-Cleared': rng.random(n_rows) < 0.6,
+    })))
+
+
+@pytest.mark.parametrize('n_vessels', [20, 4 * SPARSE_LABELS])
+def test_selection_matches_a_scan(n_vessels):
+    df = alert_frame(50_000, n_vessels)
+    index = BitmapIndex.build(df)
+    assert ('Vessel' in index.postings) == (n_vessels > SPARSE_LABELS)
+    hulls = list(df['Vessel'].cat.categories[-n_vessels:])
+    for start, end, selected_fleets, vessels in (
+        ('2025-01-05', '2025-02-10', fleets[:2], None),
+        ('2025-01-01', '2025-03-01', fleets, hulls[:3] + ['Unknown']),
+        ('2025-01-20', '2025-01-20', fleets[1:], hulls[::2]),
+    ):
+        expected = np.arange(len(df))[select_rows(df, start, end, selected_fleets, alert_types[:4], vessels)]
+        bits = index.select(selected_fleets, alert_types[:4], vessels, *date_bounds(df, start, end))
+        assert np.array_equal(np.arange(len(df))[index.rows(bits)], expected)
+        resolved = int(df['Auto-Cleared'].to_numpy()[expected].sum())
+        assert index.counts(bits) == (len(expected), len(expected) - resolved, resolved)
+
+
+def test_labels_past_the_limit_switch_to_row_numbers_and_survive_compaction():
+    index = BitmapIndex()
+    parts = [alert_frame(200_000, 10, seed=1), alert_frame(400_000, 4 * SPARSE_LABELS, seed=2)]
+    for part in parts:
+        index.append(part)
+    assert 'Vessel' in index.postings
+    rest = pd.concat(parts, ignore_index=True).iloc[550_000:].reset_index(drop=True)
+    index.drop_front(550_000)
+    vessels = list(rest['Vessel'].unique()[:5])
+    expected = np.flatnonzero(rest['Vessel'].isin(vessels) & rest['Fleet'].isin(fleets[:2]))
+    for copy in (index, index.copy()):
+        assert np.array_equal(np.arange(len(rest))[copy.rows(copy.select(fleets[:2], None, vessels))], expected)
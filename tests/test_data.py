@@ -0,0 +1,20 @@
+from alert_data import generate_alerts
+from alert_engine import AlertEngine, AlertFilters
+from alert_schema import alert_types, fleets
+from alert_store import write_alerts
+
+
+def test_multiselects_share_one_parquet_load(tmp_path):
+    write_alerts(generate_alerts(n_rows=5_000), tmp_path)
+    engine = AlertEngine('parquet', path=str(tmp_path))
+    filters = AlertFilters.for_period("Last 30 Days", engine.latest_date())
+    df = engine.frame(filters)
+    for selected_fleets, selected_types in ((fleets[:1], alert_types), (fleets[2:], alert_types[:3]), ([], [])):
+        narrowed = AlertFilters(filters.start_date, filters.end_date, selected_fleets, selected_types)
+        assert engine.frame(narrowed) is df
+    assert df['Date'].min() >= filters.start_date.floor('D')
+    assert set(df['Fleet'].unique()) == set(fleets)
+    # The multiselects still filter the aggregates
+    result = engine.query(AlertFilters(filters.start_date, filters.end_date, fleets[:1], alert_types))
+    assert list(result.fleet_alerts.index) == fleets[:1]
+    assert result.kpis.total_alerts == int(((df['Date'] >= filters.start_date) & (df['Fleet'] == fleets[0])).sum())
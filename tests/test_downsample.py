@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from alert_downsample import BUCKETS, downsample_trend
+from alert_metrics import alerts_time_frame
+
+
+def trend_frame(n_days, end='2026-03-19', seed=0):
+    rng = np.random.default_rng(seed)
+    first = np.datetime64(pd.Timestamp(end) - pd.Timedelta(days=n_days - 1), 'D')
+    return alerts_time_frame(first, rng.integers(0, 50, n_days), rng.integers(0, 80, n_days))
+
+
+@pytest.mark.parametrize('n_days', [40, 500, 3000])
+@pytest.mark.parametrize('mode', ['sum', 'lttb', 'minmax'])
+def test_downsampled_trend_keeps_endpoints_and_totals(mode, n_days):
+    trend = trend_frame(n_days)
+    out = downsample_trend(trend, width_px=300, mode=mode)
+    assert len(out) <= max(len(trend), 150)
+    assert out['Date'].is_monotonic_increasing
+    assert (out['Total Alerts'] == out['Active Alerts'] + out['Resolved Alerts']).all()
+    first, last = trend['Date'].iloc[0], trend['Date'].iloc[-1]
+    if mode == 'sum':
+        # Buckets are labelled by their start: the first one may begin before the first day, none after the last
+        largest = max(size for _, size in BUCKETS)
+        assert first - largest < out['Date'].iloc[0] <= first
+        assert out['Date'].iloc[-1] <= last
+        assert out['Total Alerts'].sum() == trend['Total Alerts'].sum()
+    else:
+        assert out['Date'].iloc[0] == first and out['Date'].iloc[-1] == last
@@ -0,0 +1,76 @@
+"""The cube and DuckDB engines must return exactly what the pandas engine returns."""
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from alert_data import generate_alerts
+from alert_filters import mark_sorted
+from alert_metrics import dashboard_view, vessel_options
+from alert_schema import alert_types, apply_schema, fleets, vessels
+
+_ids = itertools.count(1)
+
+
+def alert_frame(n_rows=20_000, nan_share=0.1, hourly=True, seed=7):
+    """Synthetic alerts with unresolved (NaN) resolution times and times of day, as a live feed sends them."""
+    rng = np.random.default_rng(seed)
+    df = generate_alerts(n_rows=n_rows, seed=seed)
+    df.loc[rng.random(len(df)) < nan_share, 'Resolution Time (hrs)'] = np.nan
+    if hourly:
+        df['Date'] += pd.to_timedelta(rng.integers(0, 24 * 60, len(df)), unit='min')
+    df = mark_sorted(apply_schema(df))
+    df.attrs['dataset_id'] = f"test-engines-{next(_ids)}"
+    return df
+
+
+def selections(df):
+    today = df['Date'].max()
+    return [
+        (today - pd.Timedelta(days=7), today, fleets, alert_types, None),
+        (today - pd.Timedelta(days=30, hours=5), today, fleets[:2], alert_types[2:5], None),
+        (pd.Timestamp('2025-02-03 12:00'), pd.Timestamp('2025-03-01 06:00'), fleets[1:], alert_types, vessels[:5]),
+        (today - pd.Timedelta(days=30), today, [], alert_types, None),
+        (pd.Timestamp('2024-12-01'), pd.Timestamp('2025-01-03'), fleets, alert_types, None),
+    ]
+
+
+def assert_same_view(expected, actual):
+    assert expected.keys() - {'rows'} <= actual.keys()
+    for key in expected.keys() - {'rows'}:
+        want, got = expected[key], actual[key]
+        if isinstance(want, pd.DataFrame):
+            pd.testing.assert_frame_equal(want, got, check_exact=True, obj=key)
+        elif isinstance(want, pd.Series):
+            pd.testing.assert_series_equal(want, got, check_exact=True, obj=key)
+        elif isinstance(want, float) and np.isnan(want):
+            assert np.isnan(got), key
+        else:
+            assert want == got, key
+
+
+@pytest.mark.parametrize('engine', ['cube', 'duckdb'])
+@pytest.mark.parametrize('hourly', [False, True])
+def test_engines_match_pandas(engine, hourly):
+    if engine == 'duckdb':
+        pytest.importorskip('duckdb')
+    df = alert_frame(hourly=hourly)
+    for selection in selections(df):
+        assert_same_view(dashboard_view(df, *selection, engine='pandas'), dashboard_view(df, *selection, engine=engine))
+        assert (vessel_options(df, *selection[:4], engine='pandas')
+                == vessel_options(df, *selection[:4], engine=engine))
+
+
+def test_avg_resolution_skips_unresolved():
+    df = alert_frame(hourly=False)
+    start, end = df['Date'].min(), df['Date'].max()
+    expected = round(float(df['Resolution Time (hrs)'].astype(np.float64).mean()), 2)
+    for engine in ('pandas', 'cube'):
+        assert dashboard_view(df, start, end, fleets, alert_types, None, engine=engine)['avg_resolution'] == expected
+
+
+def test_dates_are_floored_to_days():
+    df = apply_schema(pd.DataFrame({'Date': [pd.Timestamp('2025-01-01 05:30'), pd.NaT, pd.Timestamp('2025-01-02')]}))
+    assert df['Date'].tolist()[::2] == [pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')]
+    assert pd.isna(df['Date'].iloc[1])
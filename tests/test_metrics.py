@@ -0,0 +1,30 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from alert_metrics import bin_counts, bins, resolution_bin_codes
+
+
+def cut_codes(values, edges):
+    codes = pd.cut(pd.Series(values), bins=edges, include_lowest=True, labels=False)
+    return codes.fillna(-1).astype(np.int64).to_numpy()
+
+
+@pytest.mark.parametrize('edges', [
+    bins,
+    [0.5, 1, 2, 4],
+    [0, 0.1, 0.3, 0.7, 1.5],
+    list(np.linspace(0, 20, 201)),
+    list(np.linspace(-1, 40, 40_001)),
+])
+def test_bin_codes_match_pd_cut(edges):
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.exponential(3, 10_000),
+        [np.nan, -5, 0, 0.25, 1, 12, 1e6, np.inf],
+        [e for e in edges if np.isfinite(e)],
+    ]).astype(np.float32)
+    # Resolution times are float32; the edges from the sidebar are float64
+    codes = resolution_bin_codes(values, edges)
+    np.testing.assert_array_equal(codes.astype(np.int64), cut_codes(values.astype(np.float64), edges))
+    assert bin_counts(codes, len(edges) - 1).sum() == np.count_nonzero(codes >= 0)
@@ -0,0 +1,74 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from alert_data import generate_alerts
+from alert_filters import mark_sorted
+from alert_quantiles import PERCENTILES, RELATIVE_ACCURACY, ResolutionSketch, resolution_percentiles
+from alert_schema import alert_types, apply_schema, fleets
+
+_ids = itertools.count(1)
+
+
+def alert_frame(n_rows=30_000, seed=3):
+    df = generate_alerts(n_rows=n_rows, seed=seed)
+    df.loc[np.random.default_rng(seed).random(len(df)) < 0.05, 'Resolution Time (hrs)'] = np.nan
+    df = mark_sorted(apply_schema(df))
+    df.attrs['dataset_id'] = f"test-quantiles-{next(_ids)}"
+    return df
+
+
+def selected(df, start, end, selected_fleets, selected_types):
+    mask = (df['Date'].between(start, end) & df['Fleet'].isin(selected_fleets)
+            & df['Alert Type'].isin(selected_types))
+    return df.loc[mask, 'Resolution Time (hrs)'].dropna().to_numpy(np.float64)
+
+
+@pytest.mark.parametrize('selection', [
+    ('2025-01-01', '2025-05-01', fleets, alert_types),
+    ('2025-02-10', '2025-03-01', fleets[:2], alert_types[3:]),
+])
+def test_quantiles_within_relative_accuracy(selection):
+    df = alert_frame()
+    values = selected(df, *selection)
+    # The sketch's guarantee is on the lower-rank quantile
+    exact = np.quantile(values, PERCENTILES, method='lower')
+    approx = resolution_percentiles(df, *selection, vessels=None).to_numpy()
+    np.testing.assert_array_less(np.abs(approx - exact), RELATIVE_ACCURACY * exact + 1e-9)
+
+
+def test_appending_and_removing_matches_a_rebuild():
+    df = alert_frame()
+    first, second = df.iloc[:12_000], df.iloc[12_000:]
+    sketch = ResolutionSketch.build(second)
+    sketch.append(first)
+    rebuilt = ResolutionSketch.build(df)
+    for start, end in (('2025-01-01', '2025-05-01'), ('2025-01-20', '2025-02-02')):
+        np.testing.assert_array_equal(sketch.merged(start, end), rebuilt.merged(start, end))
+        pd.testing.assert_frame_equal(sketch.merged(start, end, by='Fleet'), rebuilt.merged(start, end, by='Fleet'))
+    sketch.remove(first)
+    np.testing.assert_array_equal(sketch.merged('2025-01-01', '2025-05-01'),
+                                  ResolutionSketch.build(second).merged('2025-01-01', '2025-05-01'))
+
+
+def test_empty_selection_has_no_percentiles():
+    df = alert_frame()
+    assert resolution_percentiles(df, '2026-01-01', '2026-02-01', fleets, alert_types, None).isna().all()
+    assert resolution_percentiles(df, '2025-01-01', '2025-05-01', [], alert_types, None, by='Fleet').empty
+    for by in (None, 'Fleet', 'Alert Type'):
+        result = resolution_percentiles(df, '2025-01-01', '2025-05-01', fleets, alert_types, [], by=by)
+        assert result.isna().all() if by is None else (result.empty and list(result.columns) == ['p50', 'p90', 'p99'])
+
+
+def test_vessel_filter_gives_exact_percentiles():
+    df = alert_frame()
+    vessels = ['Vessel_1', 'Vessel_7']
+    mask = df['Date'].between('2025-01-01', '2025-03-01') & df['Vessel'].isin(vessels)
+    values = df.loc[mask, 'Resolution Time (hrs)'].dropna().to_numpy(np.float64)
+    result = resolution_percentiles(df, '2025-01-01', '2025-03-01', fleets, alert_types, vessels)
+    np.testing.assert_allclose(result.to_numpy(), np.quantile(values, PERCENTILES))
+    by_fleet = resolution_percentiles(df, '2025-01-01', '2025-03-01', fleets, alert_types, vessels, by='Fleet')
+    fleet_a = df.loc[mask & (df['Fleet'] == 'Fleet A'), 'Resolution Time (hrs)'].dropna().to_numpy(np.float64)
+    np.testing.assert_allclose(by_fleet.loc['Fleet A'].to_numpy(), np.quantile(fleet_a, PERCENTILES))
@@ -0,0 +1,74 @@
+import json
+import queue
+import time
+
+import pandas as pd
+
+from alert_data import generate_alerts
+from alert_sketches import DistinctSketch, sketch_for
+from alert_stream import LiveAlerts, drain_queue, parse_lines, records_frame, retention_cutoff
+
+
+def alert_record(date, auto_cleared=True):
+    return {'Date': date, 'Fleet': 'Fleet A', 'Vessel': 'Vessel_1', 'Alert Type': 'Speeding',
+            'Resolution Time (hrs)': 1.5, 'Auto-Cleared': auto_cleared}
+
+
+def test_malformed_lines_and_records_are_skipped():
+    lines = [json.dumps(alert_record('2025-01-01')), '{bad json', '[1, 2]', '',
+             json.dumps({'Date': '2025-01-02'}), json.dumps(alert_record('not a date')),
+             json.dumps(alert_record('2025-01-02 05:00', 'false'))]
+    df = records_frame(parse_lines(lines))
+    assert df['Date'].tolist() == [pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02')]
+    assert df['Auto-Cleared'].tolist() == [True, False]
+
+
+def test_utc_offsets_are_converted_and_dropped():
+    df = records_frame([alert_record('2025-01-01T08:15:00Z'), alert_record('2025-01-01T23:30:00-05:00'),
+                        alert_record('2025-01-03')])
+    assert df['Date'].dt.tz is None
+    assert df['Date'].tolist() == [pd.Timestamp('2025-01-01'), pd.Timestamp('2025-01-02'), pd.Timestamp('2025-01-03')]
+
+    live = LiveAlerts(capacity=10)
+    live.start(drain_queue(queue_of([alert_record(f'2025-01-0{day}T08:15:00Z') for day in range(1, 6)]), timeout=0.01, stop=live._stop))
+    deadline = time.monotonic() + 5
+    while len(live.snapshot()) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    live.stop()
+    assert len(live.snapshot()) == 5
+
+
+def queue_of(records):
+    source = queue.Queue()
+    for record in records:
+        source.put(record)
+    return source
+
+
+def test_ingest_of_an_all_bad_batch_keeps_the_window():
+    live = LiveAlerts(capacity=10)
+    live.ingest([{'Date': None}])
+    live.ingest([alert_record('2025-01-01')])
+    assert len(live.snapshot()) == 1
+
+
+def test_window_keeps_last_30_days_in_january():
+    assert retention_cutoff(pd.Timestamp('2025-01-05')) == pd.Timestamp('2024-12-06')
+    assert retention_cutoff(pd.Timestamp('2025-06-05')) == pd.Timestamp('2025-01-01')
+    assert retention_cutoff(pd.Timestamp('2025-06-05'), days=400) == pd.Timestamp('2024-05-01')
+
+    live = LiveAlerts(capacity=10_000)
+    live.ingest(generate_alerts(n_rows=3_600, days=36, base_date='2024-12-01'))
+    assert live.snapshot()['Date'].min() == pd.Timestamp('2024-12-06')
+
+
+def test_live_distinct_sketch_matches_a_rebuild():
+    live = LiveAlerts(capacity=50_000, retention_days=10)
+    for day in range(25):
+        live.ingest(generate_alerts(n_rows=2_000, days=1, seed=day,
+                                    base_date=pd.Timestamp('2025-01-01') + pd.Timedelta(days=day)))
+    df = live.snapshot()
+    assert sketch_for(df) is live.distinct
+    rebuilt = DistinctSketch.build(df)
+    for start, end in ((df['Date'].min(), df['Date'].max()), ('2025-01-20', '2025-01-22'), ('2025-01-01', '2025-01-10')):
+        assert live.distinct.distinct(start, end) == rebuilt.distinct(start, end)